@@ -2,30 +2,90 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 import os
+import time
 
 db = SQLAlchemy()
 jwt = JWTManager()
 
 def create_app():
+    started = time.perf_counter()
     app = Flask(__name__, static_folder="media")
     app.config.from_object("config.Config")
 
+    # Resolve the client address behind a reverse proxy, so per-IP limits
+    # see clients rather than the proxy
+    if app.config["PROXY_FIX_X_FOR"] or app.config["PROXY_FIX_X_PROTO"] or app.config["PROXY_FIX_X_HOST"]:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(
+            app.wsgi_app,
+            x_for=app.config["PROXY_FIX_X_FOR"],
+            x_proto=app.config["PROXY_FIX_X_PROTO"],
+            x_host=app.config["PROXY_FIX_X_HOST"],
+        )
+
     # Ensure the upload folder exists
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
-    # Initialize extensions
-    db.init_app(app)
+    # Initialize extensions (engine pool and SQLite pragmas come from config)
+    from app import database
+    database.init_app(app, db)
     jwt.init_app(app)
 
+    # Metrics hooks and /metrics endpoint
+    from app.metrics import metrics
+    metrics.init_app(app)
+
+    # Configure OCR inference, face detection, the quality gate and media storage
+    from app.services import card_layout, media_gc, media_variants, ocr_service, photo_profile, quality_gate, vocabulary
+    from app.services.storage import storage
+    ocr_service.init_app(app)
+    photo_profile.init_app(app)
+    card_layout.init_app(app)
+    quality_gate.init_app(app)
+    storage.init_app(app)
+    media_variants.init_app(app)
+    media_gc.init_app(app)
+    vocabulary.init_app(app)
+
+    # Open the extraction result and profile caches
+    from app.services.profile_cache import profile_cache
+    from app.services.result_cache import result_cache
+    profile_cache.init_app(app)
+    result_cache.init_app(app)
+
+    # Password hashing pool and login attempt limiter
+    from app.services import passwords
+    from app.services.rate_limit import login_limiter
+    passwords.init_app(app)
+    login_limiter.init_app(app)
+
+    # Start the ID card extraction worker pools
+    from app.services import id_card_service
+    from app.services.job_queue import jobs
+    id_card_service.init_app(app)
+    jobs.init_app(app)
+
     # Register routes
-    from app.routes import auth_routes, profile_routes, upload_routes
+    from app.routes import admin_routes, auth_routes, profile_routes, upload_routes
+    app.register_blueprint(admin_routes.bp)
     app.register_blueprint(auth_routes.bp)
     app.register_blueprint(profile_routes.bp)
     app.register_blueprint(upload_routes.bp)
 
-    # Create database tables if they don't exist
+    # Register CLI commands
+    from app import commands
+    commands.init_app(app)
+
+    # Create database tables and indexes if they don't exist
+    from app.models import ensure_indexes
     with app.app_context():
         db.create_all()
+        ensure_indexes()
+
+    # OCR and OpenCV models load on first use (or via `flask warmup`),
+    # so this only covers config, extensions, routes and tables
+    app.extensions["startup_seconds"] = time.perf_counter() - started
+    app.logger.info(f"App started in {app.extensions['startup_seconds']:.3f}s")
 
     return app
 
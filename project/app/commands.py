@@ -0,0 +1,81 @@
+import click
+from flask import current_app
+
+
+@click.command("warmup")
+def warmup_command():
+    """Load OCR and OpenCV resources and run one dummy inference."""
+    from app.services.warmup import warm_up
+
+    click.echo(f"app startup: {current_app.extensions['startup_seconds']:.3f}s")
+    for name, seconds in warm_up().items():
+        click.echo(f"{name}: {seconds:.3f}s")
+
+
+@click.command("export-accounts")
+@click.option("--format", "fmt", type=click.Choice(["ndjson", "csv"]), default="ndjson")
+@click.option("--output", type=click.File("w"), default="-", help="File to write, stdout by default.")
+def export_accounts_command(fmt, output):
+    """Stream accounts with their profiles and addresses as NDJSON or CSV."""
+    from app.services.export_service import export_accounts
+
+    for chunk in export_accounts(fmt, current_app.config["EXPORT_PAGE_SIZE"]):
+        output.write(chunk)
+
+
+@click.command("import-profiles")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), help="Defaults to the file extension.")
+def import_profiles_command(path, fmt):
+    """Bulk import profiles and addresses from a CSV or NDJSON file."""
+    from app.services.import_service import import_profiles, read_rows
+
+    fmt = fmt or path.rsplit(".", 1)[-1].lower()
+    with open(path, "rb") as f:
+        rows = read_rows(f, fmt)
+    report = import_profiles(rows, current_app.config["IMPORT_BATCH_SIZE"])
+
+    for error in report["errors"]:
+        click.echo(f"row {error['row']}: {'; '.join(error['errors'])}", err=True)
+    click.echo(f"Imported {report['imported']} of {len(rows)} rows, {report['failed']} failed")
+
+
+@click.command("gc-media")
+@click.option("--grace-period", type=int, help="Keep files younger than this many seconds.")
+@click.option("--archive", type=click.Path(file_okay=False), help="Move orphans here instead of deleting them.")
+@click.option("--batch-size", type=int, help="Files removed between pauses.")
+@click.option("--pause", type=float, help="Seconds to pause between batches.")
+@click.option("--dry-run", is_flag=True, help="Only report what would be removed.")
+def gc_media_command(grace_period, archive, batch_size, pause, dry_run):
+    """Delete or archive uploaded media that no profile references."""
+    from app.services.media_gc import collect
+
+    report = collect(grace_period, archive, batch_size, pause, dry_run)
+    for error in report["errors"]:
+        click.echo(error, err=True)
+    action = "would remove" if dry_run else ("archived" if report["archive_folder"] else "removed")
+    click.echo(
+        f"Scanned {report['scanned']} files: {report['referenced']} referenced, "
+        f"{report['recent']} within the grace period, {action} {report['removed']} "
+        f"({report['bytes_reclaimed']} bytes)"
+    )
+
+
+@click.command("quantize-ocr-model")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False))
+@click.argument("target", type=click.Path(dir_okay=False))
+def quantize_ocr_model_command(source, target):
+    """Write an 8-bit quantized copy of an ONNX OCR model for the onnx backend."""
+    import os
+    from app.services.ocr_backends import quantize_model
+
+    quantize_model(source, target)
+    click.echo(f"{source}: {os.path.getsize(source)} bytes -> {target}: {os.path.getsize(target)} bytes")
+
+
+def init_app(app):
+    app.cli.add_command(warmup_command)
+    app.cli.add_command(export_accounts_command)
+    app.cli.add_command(import_profiles_command)
+    app.cli.add_command(quantize_ocr_model_command)
+    app.cli.add_command(gc_media_command)
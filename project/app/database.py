@@ -0,0 +1,77 @@
+"""Engine options and per-connection settings for the configured database.
+
+SQLite gets WAL journaling, a busy timeout and memory-mapped reads on every
+new connection so several gunicorn workers can write without "database is
+locked" errors. Server databases (PostgreSQL, MySQL) get a sized connection
+pool with pre-ping and recycling instead.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def _is_memory(url):
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database URI."""
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    options = {"pool_pre_ping": True}
+
+    if url.get_backend_name() == "sqlite":
+        # The sqlite3 driver waits this long for a lock before raising
+        options["connect_args"] = {"timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000}
+        # In-memory databases live in a single connection, so no pool sizing
+        if _is_memory(url):
+            return options
+
+    options.update(
+        pool_size=config["DB_POOL_SIZE"],
+        max_overflow=config["DB_MAX_OVERFLOW"],
+        pool_timeout=config["DB_POOL_TIMEOUT"],
+        pool_recycle=config["DB_POOL_RECYCLE"],
+    )
+    return options
+
+
+def sqlite_pragmas(config):
+    synchronous = config["SQLITE_SYNCHRONOUS"].upper()
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(SYNCHRONOUS_LEVELS)}")
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+    ]
+
+
+def init_app(app, db):
+    """Set engine options before ``db.init_app`` and hook SQLite connections."""
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    for key, value in engine_options(app.config).items():
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"].setdefault(key, value)
+
+    db.init_app(app)
+
+    if not is_sqlite(app.config["SQLALCHEMY_DATABASE_URI"]):
+        return
+
+    pragmas = sqlite_pragmas(app.config)
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        event.listen(db.engine, "connect", set_pragmas)
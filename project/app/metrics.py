@@ -0,0 +1,187 @@
+"""Lightweight in-process metrics exposed in Prometheus text format.
+
+Each gunicorn worker keeps its own numbers. When METRICS_ENABLED is off,
+``metrics.stage`` returns a shared no-op context manager, and no request
+hooks or SQL listeners are installed.
+"""
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PREFIX = "cakrawala_"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name -> (type, help)
+DEFINITIONS = {
+    "stage_seconds": ("histogram", "Time spent in each processing stage"),
+    "request_seconds": ("histogram", "Request duration by blueprint and endpoint"),
+    "requests_in_flight": ("gauge", "Requests currently being handled by blueprint"),
+    "db_queries_total": ("counter", "Number of SQL statements executed"),
+    "db_query_seconds": ("histogram", "SQL statement duration"),
+}
+
+_NOOP = nullcontext()
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._values = {}  # (name, labels) -> number, or [bucket counts, sum, count] for histograms
+        self._callbacks = {}  # gauge name -> function returning the current value
+
+    def init_app(self, app):
+        self.enabled = app.config["METRICS_ENABLED"]
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+        from app.routes import metrics_routes
+        app.register_blueprint(metrics_routes.bp)
+
+    def define(self, name, kind, help_text):
+        DEFINITIONS.setdefault(name, (kind, help_text))
+
+    def gauge_callback(self, name, help_text, callback):
+        """Report ``callback()`` as the value of gauge ``name`` at scrape time."""
+        self.define(name, "gauge", help_text)
+        self._callbacks[name] = callback
+
+    def stage(self, name):
+        """Time a block as a pipeline stage (histogram and Server-Timing entry)."""
+        if not self.enabled:
+            return _NOOP
+        return self._timed_stage(name)
+
+    @contextmanager
+    def _timed_stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe("stage_seconds", elapsed, stage=name)
+            if has_request_context():
+                g.setdefault("server_timing", []).append((name, elapsed))
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = [[0] * len(BUCKETS), 0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            values = {
+                key: ([list(v[0]), v[1], v[2]] if isinstance(v, list) else v)
+                for key, v in self._values.items()
+            }
+        for name, callback in self._callbacks.items():
+            values[(name, ())] = callback()
+
+        by_name = {}
+        for (name, labels), value in values.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name in sorted(by_name):
+            kind, help_text = DEFINITIONS.get(name, ("untyped", name))
+            metric = PREFIX + name
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, value in sorted(by_name[name]):
+                if kind != "histogram":
+                    lines.append(f"{metric}{_labels(labels)} {value}")
+                    continue
+                counts, total, count = value
+                for bound, bucket_count in zip(BUCKETS, counts):
+                    lines.append(f"{metric}_bucket{_labels(labels + (('le', bound),))} {bucket_count}")
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{metric}_sum{_labels(labels)} {total}")
+                lines.append(f"{metric}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_seconds = 0.0
+        self.inc("requests_in_flight", blueprint=request.blueprint or "")
+
+    def _after_request(self, response):
+        if "request_started" not in g:
+            return response
+
+        timings = list(g.get("server_timing", []))
+        if g.db_queries:
+            timings.append(("db", g.db_seconds, f"{g.db_queries} queries"))
+        timings.append(("total", time.perf_counter() - g.request_started))
+
+        entries = []
+        for name, elapsed, *desc in timings:
+            entry = f"{name};dur={elapsed * 1000:.1f}"
+            if desc:
+                entry += f';desc="{desc[0]}"'
+            entries.append(entry)
+        response.headers["Server-Timing"] = ", ".join(entries)
+        return response
+
+    def _teardown_request(self, exc):
+        if "request_started" not in g:
+            return
+        blueprint = request.blueprint or ""
+        self.inc("requests_in_flight", -1, blueprint=blueprint)
+        self.observe(
+            "request_seconds",
+            time.perf_counter() - g.request_started,
+            blueprint=blueprint,
+            endpoint=request.endpoint or "",
+        )
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    metrics.inc("db_queries_total")
+    metrics.observe("db_query_seconds", elapsed)
+    if has_request_context() and "db_queries" in g:
+        g.db_queries += 1
+        g.db_seconds += elapsed
+
+
+metrics = Metrics()
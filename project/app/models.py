@@ -1,4 +1,5 @@
 from app import db
+from datetime import datetime
 import uuid
 
 
@@ -6,13 +7,16 @@ class Account(db.Model):
     id = db.Column(db.String, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = db.Column(db.String(100), unique=True, nullable=False)
     phone = db.Column(db.String(20), nullable=True)
-    password = db.Column(db.String(32), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(10), default="user")
 
+    profile = db.relationship("Profile", uselist=False, lazy="select")
+    address = db.relationship("Address", uselist=False, lazy="select")
+
 
 class Profile(db.Model):
     id = db.Column(db.String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    id_account = db.Column(db.String, db.ForeignKey("account.id"), nullable=False)
+    id_account = db.Column(db.String, db.ForeignKey("account.id"), nullable=False, index=True)
     nik = db.Column(db.String(16), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     pob = db.Column(db.String(50), nullable=False)
@@ -28,7 +32,7 @@ class Profile(db.Model):
 
 class Address(db.Model):
     id = db.Column(db.String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    id_user = db.Column(db.String, db.ForeignKey("account.id"), nullable=False)
+    id_user = db.Column(db.String, db.ForeignKey("account.id"), nullable=False, index=True)
     province = db.Column(db.String(100), nullable=False)
     city = db.Column(db.String(100), nullable=False)
     subdistrict = db.Column(db.String(100), nullable=False)
@@ -36,3 +40,19 @@ class Address(db.Model):
     address = db.Column(db.Text, nullable=False)
     rt = db.Column(db.String(3), nullable=False)
     rw = db.Column(db.String(3), nullable=False)
+
+
+class ExtractionJob(db.Model):
+    id = db.Column(db.String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    status = db.Column(db.String(10), nullable=False, default="pending")
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True, index=True)
+
+
+def ensure_indexes():
+    """Create indexes missing from tables that predate them (create_all skips existing tables)."""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
@@ -0,0 +1,57 @@
+from functools import wraps
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.models import Account
+from app.services.export_service import export_accounts, EXPORT_FORMATS
+from app.services.import_service import import_profiles, read_rows, IMPORT_FORMATS
+
+bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def admin_required(view):
+    """Require a JWT whose account has the admin role."""
+    @wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        role = db.session.query(Account.role).filter_by(id=get_jwt_identity()).scalar()
+        if role != "admin":
+            return jsonify({"error": "Admin access required"}), 403
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+@bp.route("/export", methods=["GET"])
+@admin_required
+def export():
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    page_size = current_app.config["EXPORT_PAGE_SIZE"]
+    response = Response(stream_with_context(export_accounts(fmt, page_size)), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename=accounts.{fmt}"
+    return response
+
+
+@bp.route("/import", methods=["POST"])
+@admin_required
+def import_profile_rows():
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    file = request.files["file"]
+    fmt = request.form.get("format") or file.filename.rsplit(".", 1)[-1].lower()
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format. Use one of: {', '.join(IMPORT_FORMATS)}"}), 400
+
+    try:
+        rows = read_rows(file.stream, fmt)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    report = import_profiles(rows, current_app.config["IMPORT_BATCH_SIZE"])
+    return jsonify({"message": f"Imported {report['imported']} of {len(rows)} rows", "data": report}), 200
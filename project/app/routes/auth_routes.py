@@ -1,10 +1,17 @@
+import math
 from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from app import db
+from app.metrics import metrics
 from app.models import Account
+from app.services.passwords import burn_verify, hash_password, verify_password
+from app.services.rate_limit import login_limiter
 from flask_jwt_extended import create_access_token
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
 
+metrics.define("login_rejected_total", "counter", "Login attempts rejected by the rate limiter")
+
 
 @bp.route("/register", methods=["POST"])
 def register():
@@ -14,13 +21,25 @@ def register():
     confirm_password = data.get("confirm_password")
     phone = data.get("phone")
 
+    if not email or not password:
+        return jsonify({"error": "Email and password are required"}), 400
+
     if password != confirm_password:
         return jsonify({"error": "Passwords do not match"}), 400
 
+    # Check the unique email index before paying for the hash
+    if db.session.query(Account.id).filter_by(email=email).first():
+        return jsonify({"error": "Email is already registered"}), 409
+
     # Save account
-    new_account = Account(email=email, password=password, phone=phone)
+    new_account = Account(email=email, password=hash_password(password), phone=phone)
     db.session.add(new_account)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Registered concurrently by another request
+        db.session.rollback()
+        return jsonify({"error": "Email is already registered"}), 409
 
     return jsonify({"message": "User registered successfully"}), 201
 
@@ -31,10 +50,34 @@ def login():
     email = data.get("email")
     password = data.get("password")
 
-    user = Account.query.filter_by(email=email, password=password).first()
+    if not email or not password:
+        return jsonify({"error": "Invalid credentials"}), 401
+
+    # Reject bursts before any database or hashing work; remote_addr is the
+    # client as resolved by ProxyFix when PROXY_FIX_X_FOR is set
+    rejected = login_limiter.hit(email, request.remote_addr)
+    if rejected:
+        scope, retry_after = rejected
+        metrics.inc("login_rejected_total", scope=scope)
+        response = jsonify({"error": "Too many login attempts, try again later"})
+        response.headers["Retry-After"] = str(math.ceil(retry_after))
+        return response, 429
+
+    user = Account.query.filter_by(email=email).first()
     if not user:
+        burn_verify(password)
+        return jsonify({"error": "Invalid credentials"}), 401
+
+    matches, needs_rehash = verify_password(user.password, password)
+    if not matches:
         return jsonify({"error": "Invalid credentials"}), 401
 
+    # Upgrade plaintext rows and outdated work factors on a successful login
+    if needs_rehash:
+        user.password = hash_password(password)
+        db.session.commit()
+
+    login_limiter.succeeded(email)
     token = create_access_token(identity=user.id)
     # Return the token to the user and user id account
     return jsonify({"token": token, "data": {"id_account": user.id}}), 200
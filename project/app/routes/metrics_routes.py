@@ -0,0 +1,9 @@
+from flask import Blueprint, Response
+from app.metrics import metrics
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
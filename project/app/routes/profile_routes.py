@@ -1,10 +1,11 @@
-from flask import Blueprint, request, jsonify, url_for
+from flask import Blueprint, request, jsonify, url_for, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
 import os
 from werkzeug.utils import secure_filename
 from app import db
 from app.models import Profile, Address, Account
-from app import create_app
+from app.services.profile_cache import profile_cache
 from datetime import datetime
 
 bp = Blueprint("profile", __name__, url_prefix="/profile")
@@ -55,25 +56,43 @@ def create_profile():
     )
     db.session.add(new_address)
     db.session.commit()
+    profile_cache.invalidate(id_account)
     return jsonify({"message": "Profile created successfully"}), 201
 
 
 @bp.route("/<string:user_id>", methods=["GET"])
 @jwt_required()
 def get_user_info(user_id):
-    # Fetch Account information
-    account = db.session.query(Account).filter_by(id=user_id).first()
-    if not account:
-        return jsonify({"error": "User not found"}), 404
+    cached = profile_cache.get(user_id)
+    if cached is None:
+        # Fetch Account, Profile and Address information in one query
+        account = (
+            db.session.query(Account)
+            .options(joinedload(Account.profile), joinedload(Account.address))
+            .filter_by(id=user_id)
+            .first()
+        )
+        if not account:
+            return jsonify({"error": "User not found"}), 404
 
-    # Fetch Profile information
-    profile = db.session.query(Profile).filter_by(id_account=user_id).first()
+        body = current_app.json.dumps(_serialize_user(account)).encode()
+        etag = profile_cache.set(user_id, body)
+    else:
+        body, etag = cached
 
-    # Fetch Address information
-    address = db.session.query(Address).filter_by(id_user=user_id).first()
+    # Clients that send the ETag back get a 304 without the body
+    response = current_app.response_class(body, status=200, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
+
+
+def _serialize_user(account):
+    profile = account.profile
+    address = account.address
 
     # Construct response data
-    response = {
+    return {
         "data": {
             "id": account.id,
             "email": account.email,
@@ -98,4 +117,3 @@ def get_user_info(user_id):
             "rw": address.rw if address else None,
         },
     }
-    return jsonify(response), 200
\ No newline at end of file
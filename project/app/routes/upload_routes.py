@@ -1,75 +1,209 @@
-from flask import Blueprint, request, jsonify, send_from_directory, current_app, url_for
-from app.services.ocr_service import extract_id_card
-from app.services.photo_profile import extract_face
+from flask import Blueprint, request, jsonify, send_file, current_app, url_for, abort
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.security import safe_join
+from app.metrics import metrics
+from app.services import media_variants
+from app.services.id_card_service import (
+    IdCardUpload, process_id_card, process_id_cards, ExtractionError, InvalidImageError, QualityError
+)
+from app.services.job_queue import jobs, QueueFullError
+from app.services.result_cache import result_cache
+from app.services.storage import storage, file_extension, UploadTooLargeError
 import os
-import uuid
-from app import create_app
 
 bp = Blueprint("upload", __name__, url_prefix="/upload")
 
+# Allowance for multipart boundaries, part headers and small form fields
+FORM_OVERHEAD = 64 * 1024
+
 
 @bp.route("/id-card", methods=["POST"])
 def extract_id():
+    # Cap the body before request.files parses and spools it: one file here
+    request.max_content_length = current_app.config["MAX_UPLOAD_SIZE"] + FORM_OVERHEAD
     if "id_card" not in request.files:
         return jsonify({"error": "No file uploaded"}), 400
 
     file = request.files["id_card"]
-    file_extension = file.filename.rsplit(".", 1)[-1].lower()
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
+    try:
+        with metrics.stage("read_upload"):
+            received = storage.receive(file.stream)
+    except UploadTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+
+    # Retries of the same photo reuse the stored result and media files
+    with metrics.stage("cache_lookup"):
+        cached = _cached_result(received.digest)
+    if cached is not None:
+        storage.discard(received)
+        return jsonify({
+            "message": "Extraction successful",
+            "data": cached,
+            "cache": "hit",
+        }), 200
+
+    upload = _new_upload(file.filename, received)
+
+    # Hand the slow face crop and OCR pass to the worker pool
+    if _wants_async():
+        try:
+            job_id = jobs.submit(process_id_card, upload)
+        except QueueFullError as e:
+            return jsonify({"error": str(e)}), 429
+
+        return jsonify({
+            "message": "Extraction queued",
+            "data": {
+                "job_id": job_id,
+                "status": "pending",
+                "status_url": url_for("upload.get_extraction_job", job_id=job_id, _external=True),
+            },
+            "cache": "miss",
+        }), 202
 
-    # Ensure the upload folder exists
-    upload_folder = create_app().config["UPLOAD_FOLDER"]
-    os.makedirs(upload_folder, exist_ok=True)
+    try:
+        extracted_data = process_id_card(upload)
+    except QualityError as e:
+        return jsonify(e.to_dict()), 422
+    except InvalidImageError as e:
+        return jsonify(e.to_dict()), 400
+    except ExtractionError as e:
+        return jsonify(e.to_dict()), 500
 
-    id_card_folder = os.path.join(upload_folder, "ktp")
-    os.makedirs(id_card_folder, exist_ok=True)
+    return jsonify({
+        "message": "Extraction successful",
+        "data": extracted_data,
+        "cache": "miss",
+    }), 200
 
-    file_path = os.path.join(id_card_folder, unique_filename)
-    print(f"Attempting to save file to: {file_path}")
 
-    try:
-        file.save(file_path)
-        print(f"File saved successfully: {file_path}")
-        print(os.path.abspath(file_path))
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        return jsonify({"error": "Failed to save file"}), 500
-    
-    # Extract face from image and save to profile folder
-    profile_folder = os.path.join(upload_folder, "profile")
-    os.makedirs(profile_folder, exist_ok=True)
-    face_filename = f"{uuid.uuid4()}.jpg"
-    face_file_path = os.path.join(profile_folder, face_filename)
+@bp.route("/id-card/batch", methods=["POST"])
+def extract_id_batch():
+    max_files = current_app.config["BATCH_MAX_FILES"]
+    # Cap the body before request.files parses and spools it
+    request.max_content_length = min(
+        current_app.config["MAX_CONTENT_LENGTH"],
+        max_files * (current_app.config["MAX_UPLOAD_SIZE"] + FORM_OVERHEAD),
+    )
+    files = request.files.getlist("id_cards")
+    if not files:
+        return jsonify({"error": "No files uploaded"}), 400
+
+    if len(files) > max_files:
+        return jsonify({"error": f"Too many files, the limit is {max_files}"}), 400
+
+    results = [None] * len(files)
+    uploads = []
+    pending = []
+    for i, file in enumerate(files):
+        try:
+            received = storage.receive(file.stream)
+        except UploadTooLargeError as e:
+            results[i] = {"filename": file.filename, "error": str(e)}
+            continue
+        cached = _cached_result(received.digest)
+        if cached is not None:
+            storage.discard(received)
+            results[i] = {"filename": file.filename, "data": cached, "cache": "hit"}
+        else:
+            uploads.append(_new_upload(file.filename, received))
+            pending.append(i)
+
+    if uploads:
+        for i, result in zip(pending, process_id_cards(uploads)):
+            if isinstance(result, Exception):
+                results[i] = {"filename": files[i].filename, **result.to_dict()}
+            else:
+                results[i] = {"filename": files[i].filename, "data": result, "cache": "miss"}
+
+    failed = sum(1 for result in results if "error" in result)
+    return jsonify({
+        "message": f"Processed {len(results)} files, {failed} failed",
+        "data": results,
+    }), 200
 
-    try:
-        extracted_face = extract_face(file_path)
-        extracted_face.save(face_file_path)  # Save extracted face image
-    except Exception as e:
-        return jsonify({"error": f"Failed to extract face: {str(e)}"}), 500
 
-    # Generate the absolute URL for the extracted face image
-    face_url = url_for("upload.serve_media_file", filename=f"profile/{face_filename}", _external=True)
+@bp.route("/id-card/<string:job_id>", methods=["GET"])
+def get_extraction_job(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
 
+    return jsonify({"data": job}), 200
 
-    # Generate the absolute URL for the uploaded file
-    absolute_url = url_for("upload.serve_media_file", filename=f"ktp/{unique_filename}", _external=True)
 
-    # Run OCR extraction
-    try:
-        extracted_data = extract_id_card(file_path)
-        extracted_data["ktp_url"] = absolute_url
-        extracted_data["photo_url"] = face_url
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+def _cached_result(digest):
+    """Return the cached extraction for ``digest`` if its media files are still stored.
 
-    return jsonify({
-        "message": "Extraction successful",
-        "data": extracted_data,
-    }), 200
+    The media collector may have removed them since; the upload is then
+    processed again, which stores them anew.
+    """
+    cached = result_cache.get(digest)
+    if cached is None:
+        return None
+    if not all(storage.exists(cached.get(key)) for key in ("ktp_url", "photo_url")):
+        return None
+    return cached
+
+
+def _new_upload(filename, received):
+    """Store an uploaded ID card and pick where its face crop goes.
+
+    Both are named by the upload's content hash, so a repeated photo maps
+    to the same files.
+    """
+    with metrics.stage("save_original"):
+        relative_path = storage.commit(received, "ktp", file_extension(filename))
+    face_relative_path = storage.relative_path("profile", received.digest, "jpg")
+
+    return IdCardUpload(
+        storage.read(relative_path),
+        storage.path(relative_path),
+        storage.path(face_relative_path),
+        storage.url(relative_path),
+        storage.url(face_relative_path),
+        received.digest,
+    )
+
+
+def _wants_async():
+    """Check the ``async`` query or form flag on the upload request."""
+    flag = request.args.get("async", request.form.get("async", ""))
+    return flag.lower() in ("1", "true", "yes")
+
+
+@bp.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    limit = request.max_content_length
+    return jsonify({"error": f"Request is larger than the {limit} byte limit"}), 413
 
 
-# Serve media files
+# Serve media files, or a resized copy with ?variant=thumb|medium
 @bp.route("/media/<path:filename>", methods=["GET"])
 def serve_media_file(filename):
-    media_folder = current_app.config["UPLOAD_FOLDER"]
-    return send_from_directory(media_folder, filename)
+    variant = request.args.get("variant")
+    if variant:
+        try:
+            path = media_variants.ensure_variant(filename, variant)
+        except media_variants.UnknownVariantError as e:
+            return jsonify({"error": str(e)}), 400
+        except media_variants.NotAnImageError as e:
+            return jsonify({"error": str(e)}), 415
+    else:
+        path = safe_join(current_app.config["UPLOAD_FOLDER"], filename)
+
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    # Stored media never changes under the same name, so clients can keep it
+    response = send_file(
+        path,
+        conditional=True,
+        etag=media_variants.content_etag(path),
+        max_age=current_app.config["MEDIA_MAX_AGE"],
+    )
+    if current_app.config["MEDIA_CACHE_PRIVATE"]:
+        # send_file marks cacheable responses public
+        response.cache_control.public = False
+        response.cache_control.private = True
+    return response
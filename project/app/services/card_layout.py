@@ -0,0 +1,142 @@
+"""Find the ID card in a photo and cut it down to the region worth OCR-ing.
+
+A KTP has a fixed layout: the province and regency header across the top,
+the labelled fields in the left column and the photo and signature in the
+right column. The card is located on a downscaled copy, warped to a fixed
+working resolution and the photo column is blanked out before OCR.
+"""
+import cv2
+import numpy as np
+
+# Layout settings, overridden from the app config by init_app
+settings = {
+    "enabled": True,
+    # Working resolution of the rectified card
+    "width": 1000,
+    "height": 630,
+    # Smallest card outline to accept, as a fraction of the photo area
+    "min_area": 0.2,
+    # Card edges are searched on a copy whose longest side is at most this
+    "max_side": 640,
+    # Left edge of the photo and signature column, as a fraction of card width
+    "photo_column": 0.72,
+    # Bottom of the header, as a fraction of card height (kept full width)
+    "header_height": 0.2,
+}
+
+# ISO/IEC 7810 ID-1, 85.60 x 53.98 mm
+CARD_ASPECT = 85.60 / 53.98
+ASPECT_TOLERANCE = 0.25
+
+# Passed as ``corners`` when the card hasn't been searched for yet
+UNSEARCHED = object()
+
+
+def init_app(app):
+    settings.update(app.config["CARD_LAYOUT"])
+
+
+def _order_corners(points):
+    """Order four points as top-left, top-right, bottom-right, bottom-left."""
+    points = np.asarray(points, dtype=np.float32).reshape(4, 2)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)],
+    ], dtype=np.float32)
+
+
+def _card_aspect(corners):
+    """Width over height of an ordered quadrilateral (portrait cards come out below 1)."""
+    top, right, bottom, left = (np.linalg.norm(corners[i] - corners[(i + 1) % 4]) for i in range(4))
+    return (top + bottom) / max(left + right, 1)
+
+
+def locate_card(image):
+    """Return the card's four corners in ``image`` coordinates, or None.
+
+    Takes the largest convex four-sided outline (or near-rectangular blob)
+    with a landscape card-like aspect ratio.
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, settings["max_side"] / max(height, width))
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if scale < 1.0:
+        gray = cv2.resize(gray, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = settings["min_area"] * gray.shape[0] * gray.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True):
+        area = cv2.contourArea(contour)
+        if area < min_area:
+            break
+
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            corners = approx
+        else:
+            # Rounded or partly occluded corners: fall back to the bounding
+            # rotated rectangle if the outline mostly fills it
+            rect = cv2.minAreaRect(contour)
+            if area < 0.85 * rect[1][0] * rect[1][1]:
+                continue
+            corners = cv2.boxPoints(rect)
+
+        corners = _order_corners(corners)
+        if abs(_card_aspect(corners) - CARD_ASPECT) <= ASPECT_TOLERANCE:
+            return corners / scale
+
+    return None
+
+
+def rectify(image, face_box=None, corners=UNSEARCHED):
+    """Warp the card to the working resolution and blank the photo column.
+
+    Returns ``(card, found)``. When no card outline is found the whole photo
+    is taken as the card; it is only blanked if its shape is card-like, since
+    the layout assumptions don't hold otherwise. ``face_box`` is an
+    ``(x, y, w, h)`` box in ``image`` coordinates that is blanked as well.
+    ``corners`` is a previous locate_card result for ``image`` (None when
+    nothing was found), saving a second search.
+    """
+    width, height = settings["width"], settings["height"]
+    target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+
+    if corners is UNSEARCHED:
+        corners = locate_card(image)
+    if corners is not None:
+        matrix = cv2.getPerspectiveTransform(corners, target)
+        card = cv2.warpPerspective(image, matrix, (width, height), flags=cv2.INTER_LINEAR)
+        layout_applies = True
+    else:
+        image_height, image_width = image.shape[:2]
+        layout_applies = abs(image_width / image_height - CARD_ASPECT) <= ASPECT_TOLERANCE
+        if not layout_applies:
+            # Keep the aspect ratio and just normalize the width
+            height = round(image_height * width / image_width)
+        matrix = np.diag([width / image_width, height / image_height, 1.0])
+        card = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+    # Blank regions with the card's own background colour, so no new edges appear
+    fill = tuple(int(v) for v in np.median(card[::8, ::8].reshape(-1, 3), axis=0))
+
+    if layout_applies:
+        top = round(settings["header_height"] * height)
+        left = round(settings["photo_column"] * width)
+        card[top:, left:] = fill
+
+    if face_box is not None:
+        x, y, w, h = face_box
+        box = np.array([[[x, y], [x + w, y], [x + w, y + h], [x, y + h]]], dtype=np.float32)
+        mapped = cv2.perspectiveTransform(box, matrix)[0]
+        x1, y1 = np.clip(mapped.min(axis=0), 0, [width, height]).astype(int)
+        x2, y2 = np.clip(mapped.max(axis=0), 0, [width, height]).astype(int)
+        card[y1:y2, x1:x2] = fill
+
+    return card, corners is not None
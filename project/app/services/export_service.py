@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from app import db
+from app.models import Account, Profile, Address
+
+# Exported columns, in order
+EXPORT_COLUMNS = [
+    ("id", Account.id),
+    ("email", Account.email),
+    ("phone", Account.phone),
+    ("role", Account.role),
+    ("nik", Profile.nik),
+    ("name", Profile.name),
+    ("pob", Profile.pob),
+    ("dob", Profile.dob),
+    ("gender", Profile.gender),
+    ("religion", Profile.religion),
+    ("marital_status", Profile.marital_status),
+    ("occupation", Profile.occupation),
+    ("nationality", Profile.nationality),
+    ("ktp_url", Profile.ktp_url),
+    ("photo_url", Profile.photo_url),
+    ("province", Address.province),
+    ("city", Address.city),
+    ("subdistrict", Address.subdistrict),
+    ("village", Address.village),
+    ("address", Address.address),
+    ("rt", Address.rt),
+    ("rw", Address.rw),
+]
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+def iter_account_pages(page_size=1000):
+    """Yield pages of account rows joined with their profile and address.
+
+    Pages are fetched by keyset pagination on the account primary key, and
+    each page is read through a server-side cursor where the database
+    supports one, so memory use doesn't grow with the table.
+    """
+    names = [name for name, _ in EXPORT_COLUMNS]
+    base = (
+        select(*[column.label(name) for name, column in EXPORT_COLUMNS])
+        .outerjoin(Profile, Profile.id_account == Account.id)
+        .outerjoin(Address, Address.id_user == Account.id)
+        .order_by(Account.id)
+        .limit(page_size)
+        .execution_options(stream_results=True, yield_per=page_size)
+    )
+
+    last_id = None
+    while True:
+        stmt = base if last_id is None else base.where(Account.id > last_id)
+        page = [dict(zip(names, row)) for row in db.session.execute(stmt)]
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"]
+
+
+def export_accounts(fmt="ndjson", page_size=1000):
+    """Yield the account export as text chunks, one chunk per page."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([name for name, _ in EXPORT_COLUMNS])
+        yield _drain(buffer)
+
+    for page in iter_account_pages(page_size):
+        if fmt == "csv":
+            writer.writerows([_csv_value(value) for value in row.values()] for row in page)
+            yield _drain(buffer)
+        else:
+            yield "".join(json.dumps(row, default=_json_value) + "\n" for row in page)
+
+
+def _drain(buffer):
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _json_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
@@ -0,0 +1,176 @@
+import cv2
+import numpy as np
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from app.metrics import metrics
+from app.services import card_layout, media_variants
+from app.services.ocr_service import extract_id_card, extract_id_cards
+from app.services import quality_gate
+from app.services.photo_profile import find_face, pad_box
+from app.services.result_cache import result_cache
+from app.services.storage import storage
+
+# Renders media variants off the request path
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media-writer")
+
+# Runs face detection for batch uploads, created by init_app
+_face_pool = None
+
+# Render thumbnail and medium copies right after the files are written
+_variants_on_upload = True
+
+# An uploaded ID card and where its media will be stored
+IdCardUpload = namedtuple(
+    "IdCardUpload", ["image_bytes", "file_path", "face_file_path", "ktp_url", "photo_url", "cache_key"]
+)
+
+
+class ExtractionError(Exception):
+    """Raised when a stage of the ID card pipeline fails."""
+
+    def to_dict(self):
+        """The error body returned to the client."""
+        return {"error": str(self)}
+
+
+class InvalidImageError(ExtractionError):
+    """Raised when the uploaded bytes can't be decoded as an image."""
+
+
+class QualityError(ExtractionError):
+    """Raised when the quality gate rejects a photo; ``problems`` says why."""
+
+    def __init__(self, problems):
+        super().__init__("Photo is not usable: " + ", ".join(problem["code"] for problem in problems))
+        self.problems = problems
+
+    def to_dict(self):
+        return {"error": str(self), "problems": self.problems}
+
+
+def init_app(app):
+    global _face_pool, _variants_on_upload
+    _face_pool = ThreadPoolExecutor(max_workers=app.config["FACE_WORKERS"], thread_name_prefix="face")
+    _variants_on_upload = app.config["MEDIA_VARIANTS_ON_UPLOAD"]
+
+
+def decode_image(image_bytes):
+    """Decode encoded image bytes into a BGR array."""
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise InvalidImageError("Uploaded file is not a valid image")
+    return image
+
+
+def _prepare(upload):
+    """Decode the stored upload and save its face crop.
+
+    Returns the decoded image, the face box, which OCR blanks out, and the
+    card corners if the quality gate located the card.
+    """
+    with metrics.stage("decode"):
+        image = decode_image(upload.image_bytes)
+
+    # Reject blurred, badly exposed or card-less photos before any detection
+    corners = card_layout.UNSEARCHED
+    gate = quality_gate.settings["enabled"]
+    if gate:
+        with metrics.stage("quality"):
+            problems, corners = quality_gate.inspect_image(image)
+        if problems:
+            quality_gate.count_rejection(problems)
+            raise QualityError(problems)
+    # Only render variants for photos that passed
+    if _variants_on_upload:
+        _writer.submit(media_variants.create_variants, upload.file_path)
+
+    # Extract face from image and save to profile folder
+    try:
+        with metrics.stage("face"):
+            if gate:
+                problems, faces = quality_gate.inspect_faces(image)
+                if problems:
+                    quality_gate.count_rejection(problems)
+                    raise QualityError(problems)
+                face_box = pad_box(image, faces[0]) if len(faces) == 1 else None
+            else:
+                face_box = find_face(image)
+        if face_box is None:
+            raise ValueError("no single face detected")
+        x, y, w, h = face_box
+        extracted_face = image[y:y + h, x:x + w]
+        with metrics.stage("save_face"):
+            # Save extracted face image, once per distinct upload
+            encoded = cv2.imencode(".jpg", extracted_face)[1].tobytes()
+            storage.write(upload.face_file_path, encoded)
+        if _variants_on_upload:
+            _writer.submit(media_variants.create_variants, upload.face_file_path)
+    except QualityError:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"Failed to extract face: {str(e)}")
+
+    return image, face_box, corners
+
+
+def _finish(upload, extracted_data):
+    extracted_data["ktp_url"] = upload.ktp_url
+    extracted_data["photo_url"] = upload.photo_url
+
+    if upload.cache_key:
+        result_cache.set(upload.cache_key, extracted_data)
+    return extracted_data
+
+
+def process_id_card(upload):
+    """Crop the face and run OCR on an uploaded ID card image.
+
+    The upload is decoded once and the same array is shared by face
+    detection, cropping and OCR. Successful results are stored in the
+    result cache under the upload's ``cache_key``.
+    """
+    image, face_box, corners = _prepare(upload)
+
+    # Run OCR extraction
+    try:
+        extracted_data = extract_id_card(image, upload.image_bytes, face_box, corners)
+    except Exception as e:
+        raise ExtractionError(str(e))
+
+    return _finish(upload, extracted_data)
+
+
+def process_id_cards(uploads):
+    """Process several uploads, returning a result dict or an exception for each.
+
+    Face extraction runs in parallel and the images that pass it go through
+    OCR as one batch.
+    """
+    def prepare(upload):
+        # Any failure belongs to this upload alone, not to the whole batch
+        try:
+            return _prepare(upload)
+        except ExtractionError as e:
+            return e
+        except Exception as e:
+            return ExtractionError(str(e))
+
+    results = list(_face_pool.map(prepare, uploads))
+    ready = [i for i, result in enumerate(results) if not isinstance(result, Exception)]
+    if not ready:
+        return results
+
+    # Run OCR extraction
+    try:
+        images, face_boxes, card_corners = zip(*(results[i] for i in ready))
+        batch = extract_id_cards(
+            list(images), [uploads[i].image_bytes for i in ready], list(face_boxes), list(card_corners)
+        )
+    except Exception as e:
+        for i in ready:
+            results[i] = ExtractionError(str(e))
+        return results
+
+    for i, extracted_data in zip(ready, batch):
+        results[i] = _finish(uploads[i], extracted_data)
+    return results
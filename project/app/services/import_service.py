@@ -0,0 +1,189 @@
+import csv
+import io
+import json
+import re
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import insert
+from app import db
+from app.models import Account, Profile, Address
+from app.services.profile_cache import profile_cache
+
+PROFILE_COLUMNS = [
+    "nik", "name", "pob", "dob", "gender", "religion", "marital_status",
+    "occupation", "nationality", "ktp_url", "photo_url",
+]
+ADDRESS_COLUMNS = ["province", "city", "subdistrict", "village", "address", "rt", "rw"]
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Parameters per IN (...) lookup, below SQLite's bound-variable limit
+LOOKUP_CHUNK = 900
+
+# DD-MM-YYYY like the profile form, or YYYY-MM-DD as the export writes it
+DOB_PATTERN = re.compile(r"^(\d{2}-\d{2}-\d{4}|\d{4}-\d{2}-\d{2})$")
+
+
+def read_rows(stream, fmt):
+    """Parse an uploaded CSV or NDJSON byte stream into a list of dicts."""
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        return list(csv.DictReader(text))
+
+    rows = []
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e.msg}")
+        if not isinstance(row, dict):
+            raise ValueError(f"Line {line_number} is not a JSON object")
+        rows.append(row)
+    return rows
+
+
+@lru_cache(maxsize=65536)
+def _parse_dob(value):
+    return datetime.strptime(value, "%Y-%m-%d" if value[4] == "-" else "%d-%m-%Y").date()
+
+
+def _column_rules(model, columns):
+    """(column, required, max length) for each imported column of ``model``."""
+    rules = []
+    for name in columns:
+        column = model.__table__.columns[name]
+        rules.append((name, not column.nullable, getattr(column.type, "length", None)))
+    return rules
+
+
+def validate_rows(rows):
+    """Check every row column by column and return ``(errors, dobs, values)``.
+
+    ``errors`` maps row index to a list of messages, ``dobs`` holds the
+    parsed date of birth per row (None when invalid) and ``values`` the
+    cleaned values per column.
+    """
+    errors = {}
+
+    def fail(indexes, message):
+        for i in indexes:
+            errors.setdefault(i, []).append(message)
+
+    values = {}
+    for name, required, max_length in _column_rules(Profile, PROFILE_COLUMNS) + _column_rules(Address, ADDRESS_COLUMNS):
+        column = [_clean(row.get(name)) for row in rows]
+        values[name] = column
+        if required:
+            fail([i for i, value in enumerate(column) if value is None], f"{name} is required")
+        if max_length:
+            fail(
+                [i for i, value in enumerate(column) if value is not None and len(value) > max_length],
+                f"{name} is longer than {max_length} characters",
+            )
+
+    # Dates of birth: shape check on the whole column, then cached parsing
+    dobs = [None] * len(rows)
+    for i, value in enumerate(values["dob"]):
+        if value is None:
+            continue
+        if not DOB_PATTERN.match(value):
+            fail([i], "Invalid date format for dob. Use DD-MM-YYYY or YYYY-MM-DD.")
+            continue
+        try:
+            dobs[i] = _parse_dob(value)
+        except ValueError:
+            fail([i], "Invalid date for dob.")
+
+    accounts = [_clean(row.get("id_account")) or _clean(row.get("email")) for row in rows]
+    fail([i for i, key in enumerate(accounts) if key is None], "id_account or email is required")
+
+    return errors, dobs, values
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _lookup(query, column, keys):
+    """Run ``query`` filtered by ``column IN keys`` in chunks, returning all rows."""
+    keys = list(keys)
+    rows = []
+    for start in range(0, len(keys), LOOKUP_CHUNK):
+        rows.extend(query.filter(column.in_(keys[start:start + LOOKUP_CHUNK])).all())
+    return rows
+
+
+def import_profiles(rows, batch_size=5000):
+    """Validate and insert profile and address rows in batched transactions.
+
+    Each row names its account by ``id_account`` or ``email``. Returns a
+    report with the number imported and the errors per row (1-based).
+    """
+    errors, dobs, values = validate_rows(rows)
+
+    # Resolve accounts and existing profiles with set-based lookups
+    ids = {_clean(row.get("id_account")) for row in rows} - {None}
+    emails = {_clean(row.get("email")) for row in rows if not _clean(row.get("id_account"))} - {None}
+    account_query = db.session.query(Account.id, Account.email)
+    known_ids = {account_id for account_id, _ in _lookup(account_query, Account.id, ids)}
+    id_by_email = {email: account_id for account_id, email in _lookup(account_query, Account.email, emails)}
+
+    account_ids = [None] * len(rows)
+    for i, row in enumerate(rows):
+        if i in errors:
+            continue
+        account_id = _clean(row.get("id_account"))
+        if account_id is None:
+            account_id = id_by_email.get(_clean(row.get("email")))
+        elif account_id not in known_ids:
+            account_id = None
+        if account_id is None:
+            errors.setdefault(i, []).append("Account not found")
+        account_ids[i] = account_id
+
+    candidates = {account_id for account_id in account_ids if account_id}
+    with_profile = {
+        account_id for (account_id,) in _lookup(db.session.query(Profile.id_account), Profile.id_account, candidates)
+    }
+
+    profiles = []
+    addresses = []
+    seen = set()
+    for i, account_id in enumerate(account_ids):
+        if i in errors:
+            continue
+        if account_id in with_profile or account_id in seen:
+            errors.setdefault(i, []).append("Profile already exists for this account.")
+            continue
+        seen.add(account_id)
+
+        profile = {name: values[name][i] for name in PROFILE_COLUMNS}
+        profile.update(id=str(uuid.uuid4()), id_account=account_id, dob=dobs[i])
+        profiles.append(profile)
+
+        address = {name: values[name][i] for name in ADDRESS_COLUMNS}
+        address.update(id=str(uuid.uuid4()), id_user=account_id)
+        addresses.append(address)
+
+    # executemany inserts, one transaction per batch
+    for start in range(0, len(profiles), batch_size):
+        db.session.execute(insert(Profile), profiles[start:start + batch_size])
+        db.session.execute(insert(Address), addresses[start:start + batch_size])
+        db.session.commit()
+
+    for profile in profiles:
+        profile_cache.invalidate(profile["id_account"])
+
+    return {
+        "imported": len(profiles),
+        "failed": len(errors),
+        "errors": [{"row": i + 1, "errors": messages} for i, messages in sorted(errors.items())],
+    }
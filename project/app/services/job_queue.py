@@ -0,0 +1,125 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app import db
+from app.metrics import metrics
+from app.models import ExtractionJob
+from app.services.id_card_service import ExtractionError
+
+# Error recorded on jobs that stayed pending past JOB_PENDING_TIMEOUT
+LOST_JOB_ERROR = "Job was lost before it finished, upload the photo again"
+
+
+class QueueFullError(Exception):
+    """Raised when every worker is busy and the pending queue is full."""
+
+
+class JobQueue:
+    """Bounded worker pool for slow extraction jobs.
+
+    Job state lives in the ``ExtractionJob`` table so any gunicorn worker can
+    answer a status request, while the pool itself is per process.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor = None
+        self._slots = None
+        self._result_ttl = timedelta(seconds=3600)
+        self._pending_timeout = timedelta(seconds=900)
+        self._depth = 0
+        self._depth_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        max_workers = app.config["OCR_WORKERS"]
+        max_pending = app.config["OCR_QUEUE_SIZE"]
+        self._result_ttl = timedelta(seconds=app.config["JOB_RESULT_TTL"])
+        self._pending_timeout = timedelta(seconds=app.config["JOB_PENDING_TIMEOUT"])
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-job")
+        # One slot per running job plus one per queued job
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        metrics.gauge_callback("ocr_queue_depth", "Extraction jobs queued or running", lambda: self._depth)
+
+    def submit(self, func, *args):
+        """Create a pending job and schedule ``func(*args)`` on the pool."""
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError("Too many extraction jobs in progress, try again later")
+
+        try:
+            self._prune_expired()
+            job = ExtractionJob(status="pending")
+            db.session.add(job)
+            db.session.commit()
+            job_id = job.id
+        except Exception:
+            self._slots.release()
+            raise
+
+        # Counted before the job can start, so _run's decrement never comes first
+        with self._depth_lock:
+            self._depth += 1
+        try:
+            self._executor.submit(self._run, job_id, func, args)
+        except Exception:
+            with self._depth_lock:
+                self._depth -= 1
+            self._slots.release()
+            raise
+
+        return job_id
+
+    def get(self, job_id):
+        job = db.session.get(ExtractionJob, job_id)
+        if not job:
+            return None
+
+        response = {
+            "job_id": job.id,
+            "status": job.status,
+            "data": None,
+            "error": job.error,
+        }
+        if job.result:
+            payload = json.loads(job.result)
+            if job.status == "failed":
+                # The same error body the synchronous endpoint returns
+                response.update(payload)
+            else:
+                response["data"] = payload
+        return response
+
+    def _run(self, job_id, func, args):
+        try:
+            with self.app.app_context():
+                try:
+                    result = func(*args)
+                    status, payload, error = "done", json.dumps(result), None
+                except Exception as e:
+                    details = e.to_dict() if isinstance(e, ExtractionError) else {"error": str(e)}
+                    status, payload, error = "failed", json.dumps(details), str(e)
+
+                job = db.session.get(ExtractionJob, job_id)
+                job.status = status
+                job.result = payload
+                job.error = error
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+        finally:
+            with self._depth_lock:
+                self._depth -= 1
+            self._slots.release()
+
+    def _prune_expired(self):
+        now = datetime.utcnow()
+        # A job whose worker died never leaves "pending"; fail it so it expires too
+        db.session.query(ExtractionJob).filter(
+            ExtractionJob.status == "pending", ExtractionJob.created_at < now - self._pending_timeout
+        ).update({"status": "failed", "error": LOST_JOB_ERROR, "finished_at": now}, synchronize_session=False)
+        db.session.query(ExtractionJob).filter(
+            ExtractionJob.status != "pending", ExtractionJob.finished_at < now - self._result_ttl
+        ).delete(synchronize_session=False)
+
+
+jobs = JobQueue()
@@ -0,0 +1,113 @@
+from collections import defaultdict
+from functools import lru_cache
+
+
+@lru_cache(maxsize=65536)
+def bounded_levenshtein(s1, s2, max_distance):
+    """Levenshtein distance, or ``max_distance + 1`` once it is known to exceed it.
+
+    Only the diagonal band of width ``max_distance`` is filled and the loop
+    stops as soon as a whole row is over the limit.
+    """
+    if s1 == s2:
+        return 0
+
+    limit = max_distance + 1
+    if abs(len(s1) - len(s2)) > max_distance:
+        return limit
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if not s2:
+        return len(s1)
+
+    len2 = len(s2)
+    previous = [j if j <= max_distance else limit for j in range(len2 + 1)]
+    for i, c1 in enumerate(s1, 1):
+        current = [limit] * (len2 + 1)
+        current[0] = row_min = i if i <= max_distance else limit
+        for j in range(max(1, i - max_distance), min(len2, i + max_distance) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (c1 != s2[j - 1]))
+            if value > limit:
+                value = limit
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min >= limit:
+            return limit
+        previous = current
+
+    return previous[len2]
+
+
+class KeywordMatcher:
+    """Precompiled fuzzy matcher for the field keywords of a KTP.
+
+    Gives the same field and value decisions as comparing every line prefix
+    and token against every keyword with a full edit distance, but only
+    compares strings whose lengths are within the field's tolerance.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.max_tolerance = max(field['tolerance'] for field in fields)
+
+        # (order, field, keyword, number of line prefixes to try), by keyword length
+        self._by_length = defaultdict(list)
+        self._max_prefixes = 0
+        order = 0
+        for field in fields:
+            for keyword in field['keywords']:
+                prefixes = len(keyword.lower().split()) + 1
+                self._by_length[len(keyword)].append((order, field, keyword, prefixes))
+                self._max_prefixes = max(self._max_prefixes, prefixes)
+                order += 1
+
+        # Lowercased keywords per field for value extraction
+        self._value_keywords = {
+            field['name']: tuple(keyword.lower() for keyword in field['keywords']) for field in fields
+        }
+
+    def find_field_match(self, line):
+        """Return the field whose keyword is closest to the start of ``line``."""
+        words = line.lower().split()
+        if not words:
+            return None
+
+        # Candidate (keyword, prefix) pairs whose lengths are close enough
+        candidates = []
+        for i in range(min(len(words), self._max_prefixes)):
+            line_part = ' '.join(words[:i + 1])
+            length = len(line_part)
+            for keyword_length in range(length - self.max_tolerance, length + self.max_tolerance + 1):
+                for order, field, keyword, prefixes in self._by_length.get(keyword_length, ()):
+                    if i < prefixes and abs(length - keyword_length) <= field['tolerance']:
+                        candidates.append((order, i, field, keyword, line_part))
+
+        # Same visiting order as the exhaustive search so ties resolve the same way
+        candidates.sort(key=lambda candidate: candidate[:2])
+
+        best_match = None
+        min_distance = float('inf')
+        for _, _, field, keyword, line_part in candidates:
+            max_distance = min(field['tolerance'], min_distance - 1)
+            if max_distance < 0:
+                continue
+            distance = bounded_levenshtein(line_part, keyword, max_distance)
+            if distance <= max_distance:
+                min_distance = distance
+                best_match = field
+                if distance == 0:
+                    break
+
+        return best_match
+
+    def value_start(self, parts, field):
+        """Return the index just past the last token in ``parts`` that matches a keyword."""
+        keywords = self._value_keywords[field['name']]
+        tolerance = field['tolerance']
+        for i in range(len(parts) - 1, -1, -1):
+            part = parts[i].lower()
+            for keyword in keywords:
+                if bounded_levenshtein(part, keyword, tolerance) <= tolerance:
+                    return i + 1
+        return 0
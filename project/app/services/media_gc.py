@@ -0,0 +1,190 @@
+"""Remove uploaded media that no profile references.
+
+Every ID card upload stores the original under ``ktp/`` and a face crop
+under ``profile/``, but only some end up in a ``Profile`` row. The
+collector reads the referenced paths from ``Profile.ktp_url`` and
+``Profile.photo_url`` in one streamed query, walks the upload folder and
+deletes (or moves to an archive folder) every other file older than the
+grace period. Resized variants go with their original, and leftover
+temporary files from interrupted uploads are collected too.
+
+Work is done in batches with a pause in between, so a large backlog
+doesn't starve request handling of disk I/O. Shard folders left empty by a
+batch are removed after it.
+
+The grace period must outlast RESULT_CACHE_TTL: a result cache hit
+returns the stored media URLs without touching the files, so a shorter
+grace period would remove media that cached results still point to.
+"""
+import os
+import shutil
+import time
+
+from sqlalchemy import select
+
+from app import db
+from app.models import Profile
+from app.services import media_variants
+from app.services.result_cache import result_cache
+from app.services.storage import TEMP_DIR, storage
+
+settings = {
+    # Files younger than this many seconds are kept, referenced or not
+    "grace_period": 7 * 24 * 3600,
+    # Files removed per batch, and seconds to pause between batches
+    "batch_size": 200,
+    "batch_pause": 0.2,
+    # Move orphans under this folder instead of deleting them
+    "archive_folder": None,
+}
+
+
+def init_app(app):
+    settings["grace_period"] = app.config["MEDIA_GC_GRACE_PERIOD"]
+    settings["batch_size"] = app.config["MEDIA_GC_BATCH_SIZE"]
+    settings["batch_pause"] = app.config["MEDIA_GC_BATCH_PAUSE"]
+    settings["archive_folder"] = app.config["MEDIA_GC_ARCHIVE_FOLDER"]
+
+
+def referenced_media(page_size=1000):
+    """Relative paths of every media file a profile points to."""
+    stmt = select(Profile.ktp_url, Profile.photo_url).execution_options(stream_results=True, yield_per=page_size)
+    referenced = set()
+    for row in db.session.execute(stmt):
+        for url in row:
+            relative_path = storage.relative_path_from_url(url)
+            if relative_path is not None:
+                referenced.add(relative_path)
+    return referenced
+
+
+def scan(root):
+    """Yield ``(relative_path, stat)`` for every file under ``root``, one directory at a time."""
+    pending = [""]
+    while pending:
+        prefix = pending.pop()
+        try:
+            entries = os.scandir(os.path.join(root, prefix) if prefix else root)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                relative_path = f"{prefix}/{entry.name}" if prefix else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(relative_path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield relative_path, entry.stat(follow_symlinks=False)
+
+
+def _original_of(relative_path):
+    """The original a variant file was rendered from, e.g. variants/thumb/ktp/a.jpg.webp -> ktp/a.jpg."""
+    parts = relative_path.split("/", 2)
+    if len(parts) < 3:
+        return None
+    original, _ = os.path.splitext(parts[2])
+    return original
+
+
+def is_referenced(relative_path, referenced):
+    top = relative_path.split("/", 1)[0]
+    if top == TEMP_DIR:
+        # Partial uploads, only ever referenced while the request runs
+        return False
+    if top == media_variants.VARIANTS_DIR:
+        return _original_of(relative_path) in referenced
+    return relative_path in referenced
+
+
+def _remove(relative_path, archive_folder):
+    path = storage.path(relative_path)
+    if archive_folder is None:
+        os.remove(path)
+        return
+    target = os.path.join(archive_folder, *relative_path.split("/"))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(path, target)
+
+
+def _remove_empty_dirs(folders):
+    """Remove emptied shard folders such as ``ktp/ab/cd``, and their parents once empty.
+
+    Top-level folders stay. A folder that got a new file in the meantime
+    is not empty and is left alone; storage recreates missing ones.
+    """
+    for folder in sorted(folders, key=lambda folder: folder.count("/"), reverse=True):
+        while "/" in folder:
+            try:
+                os.rmdir(storage.path(folder))
+            except OSError:
+                break
+            folder = folder.rsplit("/", 1)[0]
+
+
+def collect(grace_period=None, archive_folder=None, batch_size=None, batch_pause=None, dry_run=False, now=None):
+    """Remove unreferenced media older than ``grace_period`` seconds and return a report.
+
+    Arguments left as None come from the app config. With ``dry_run``
+    nothing is touched and the report shows what would be reclaimed.
+    """
+    grace_period = settings["grace_period"] if grace_period is None else grace_period
+    archive_folder = archive_folder or settings["archive_folder"]
+    batch_size = batch_size or settings["batch_size"]
+    batch_pause = settings["batch_pause"] if batch_pause is None else batch_pause
+    if grace_period <= result_cache.ttl:
+        raise ValueError(
+            f"The grace period ({grace_period}s) must be longer than RESULT_CACHE_TTL ({result_cache.ttl}s)"
+        )
+    cutoff = (now or time.time()) - grace_period
+    if archive_folder is not None:
+        archive_folder = os.path.abspath(archive_folder)
+        root = os.path.abspath(storage.root)
+        if os.path.commonpath([archive_folder, root]) == root:
+            # It would be walked and emptied on the next run
+            raise ValueError("The archive folder can't be inside the upload folder")
+
+    report = {
+        "scanned": 0,
+        "referenced": 0,
+        "recent": 0,
+        "removed": 0,
+        "bytes_reclaimed": 0,
+        "errors": [],
+        "archive_folder": archive_folder,
+        "dry_run": dry_run,
+    }
+
+    referenced = referenced_media()
+    # Release the connection before the long walk
+    db.session.remove()
+
+    in_batch = 0
+    emptied = set()
+    for relative_path, stat in scan(storage.root):
+        report["scanned"] += 1
+        if is_referenced(relative_path, referenced):
+            report["referenced"] += 1
+            continue
+        if stat.st_mtime > cutoff:
+            report["recent"] += 1
+            continue
+
+        if not dry_run:
+            try:
+                _remove(relative_path, archive_folder)
+            except OSError as e:
+                report["errors"].append(f"{relative_path}: {e}")
+                continue
+            emptied.add(relative_path.rsplit("/", 1)[0])
+        report["removed"] += 1
+        report["bytes_reclaimed"] += stat.st_size
+
+        in_batch += 1
+        if in_batch >= batch_size:
+            in_batch = 0
+            _remove_empty_dirs(emptied)
+            emptied.clear()
+            if not dry_run and batch_pause:
+                time.sleep(batch_pause)
+
+    _remove_empty_dirs(emptied)
+    return report
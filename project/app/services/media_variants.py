@@ -0,0 +1,137 @@
+"""Resized, re-encoded copies of uploaded media.
+
+Variants live under ``<UPLOAD_FOLDER>/variants/<name>/`` mirroring the
+original's path, and are written once (at upload or on the first request).
+Stored originals never change under the same name, so an existing variant
+is always current.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from werkzeug.security import safe_join
+
+from app.metrics import metrics
+
+VARIANTS_DIR = "variants"
+
+settings = {
+    "upload_folder": None,
+    # name -> longest side in pixels
+    "variants": {"thumb": 256, "medium": 1024},
+    "format": "webp",
+    "quality": 80,
+}
+
+# name -> (Pillow format, file extension)
+FORMATS = {"webp": ("WEBP", ".webp"), "jpeg": ("JPEG", ".jpg")}
+
+# (path, mtime_ns, size) -> content ETag
+_etags = OrderedDict()
+_etag_lock = threading.Lock()
+_ETAG_CACHE_SIZE = 4096
+
+
+class UnknownVariantError(ValueError):
+    """Raised for a variant name that isn't configured."""
+
+
+class NotAnImageError(ValueError):
+    """Raised when a variant is asked for a media file Pillow can't read as an image."""
+
+
+def init_app(app):
+    settings["upload_folder"] = app.config["UPLOAD_FOLDER"]
+    settings["variants"] = dict(app.config["MEDIA_VARIANTS"])
+    settings["format"] = app.config["MEDIA_VARIANT_FORMAT"].lower()
+    settings["quality"] = app.config["MEDIA_VARIANT_QUALITY"]
+    if settings["format"] not in FORMATS:
+        raise ValueError(f"MEDIA_VARIANT_FORMAT must be one of {', '.join(FORMATS)}")
+
+
+def variant_path(filename, variant):
+    """Absolute path of ``variant`` for the media file ``filename`` (relative to the upload folder)."""
+    if variant not in settings["variants"]:
+        raise UnknownVariantError(f"Unknown variant: {variant}")
+    extension = FORMATS[settings["format"]][1]
+    # Keep the original extension so ktp/a.jpg and ktp/a.png don't collide
+    return safe_join(settings["upload_folder"], VARIANTS_DIR, variant, filename + extension)
+
+
+def ensure_variant(filename, variant):
+    """Return the path of an up-to-date ``variant`` of ``filename``, creating it if needed.
+
+    Returns None when the original doesn't exist, and raises
+    NotAnImageError when it isn't an image.
+    """
+    original = safe_join(settings["upload_folder"], filename)
+    target = variant_path(filename, variant)
+    if original is None or target is None or not os.path.isfile(original):
+        return None
+
+    # Originals are named by their content hash and never change; their
+    # mtime only tracks the retention grace period, so it isn't compared
+    if os.path.isfile(target):
+        return target
+
+    with metrics.stage("media_variant"):
+        _render(original, target, settings["variants"][variant])
+    return target
+
+
+def create_variants(path):
+    """Render every configured variant of the media file at absolute ``path``."""
+    filename = os.path.relpath(path, settings["upload_folder"])
+    for variant in settings["variants"]:
+        try:
+            ensure_variant(filename, variant)
+        except NotAnImageError:
+            return
+
+
+def _render(original, target, max_side):
+    pil_format, _ = FORMATS[settings["format"]]
+    try:
+        opened = Image.open(original)
+    except UnidentifiedImageError:
+        raise NotAnImageError(f"Not an image: {os.path.basename(original)}")
+    with opened as image:
+        # Let the JPEG decoder downscale by a power of two before resizing
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Write next to the target and rename, so readers never see a partial file
+        temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            image.save(temporary, pil_format, quality=settings["quality"])
+            os.replace(temporary, target)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+
+def content_etag(path):
+    """Strong ETag from the file's SHA-256, cached while its mtime and size are unchanged."""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _etag_lock:
+        etag = _etags.get(key)
+        if etag is not None:
+            _etags.move_to_end(key)
+            return etag
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    etag = digest.hexdigest()
+
+    with _etag_lock:
+        _etags[key] = etag
+        while len(_etags) > _ETAG_CACHE_SIZE:
+            _etags.popitem(last=False)
+    return etag
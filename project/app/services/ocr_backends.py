@@ -0,0 +1,315 @@
+"""OCR engines behind one ``readtext`` interface.
+
+Every backend returns easyocr style results, a list of ``(box, text,
+confidence)`` with ``box`` the four corners of the text, so the line
+grouping and entity extraction don't depend on the engine. OCR_BACKEND
+picks one:
+
+* ``easyocr``: the easyocr reader on PyTorch.
+* ``onnx``: ONNX Runtime on the CPU with an exported text detector and
+  recognizer, e.g. easyocr's own CRAFT and CRNN models. The detector takes
+  a normalized RGB image ``(1, 3, H, W)`` and returns CRAFT region and
+  affinity maps at half resolution ``(1, H/2, W/2, 2)``. The recognizer
+  takes grayscale line crops ``(N, 1, 64, W)`` scaled to [-1, 1] and
+  returns CTC logits ``(N, T, classes)`` with the blank as class 0; the
+  charset file lists the other classes in order, on one line. 8-bit models
+  from ``flask quantize-ocr-model`` load the same way.
+* ``stub``: fixed readings, for tests and benchmarks without models.
+"""
+import json
+import math
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+# ImageNet statistics the CRAFT detector was trained with, in 0-255 RGB
+DETECTOR_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32) * 255
+DETECTOR_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32) * 255
+
+
+class OCRBackend(ABC):
+    """Base class: ``readtext`` one image, ``readtext_many`` a batch."""
+
+    name = None
+
+    @abstractmethod
+    def readtext(self, image):
+        """Return easyocr-style ``(box, text, confidence)`` readings for ``image``."""
+
+    def readtext_many(self, images):
+        return [self.readtext(image) for image in images]
+
+
+def load_image(image):
+    """Read ``image`` if it is a path; arrays are returned as they are."""
+    if isinstance(image, str):
+        array = cv2.imread(image, cv2.IMREAD_COLOR)
+        if array is None:
+            raise ValueError(f"Could not read image: {image}")
+        return array
+    return image
+
+
+class EasyOCRBackend(OCRBackend):
+    name = "easyocr"
+
+    def __init__(self, languages=("id",)):
+        # Imported here so that loading the app doesn't pull in torch
+        import easyocr
+        self.reader = easyocr.Reader(list(languages))
+
+    def readtext(self, image):
+        return self.reader.readtext(image)
+
+    def readtext_many(self, images):
+        """OCR images in batches of the same shape, as readtext_batched requires."""
+        results = [None] * len(images)
+        groups = defaultdict(list)
+        for i, image in enumerate(images):
+            groups[image.shape].append(i)
+
+        for indexes in groups.values():
+            if len(indexes) == 1:
+                results[indexes[0]] = self.reader.readtext(images[indexes[0]])
+                continue
+            batch_results = self.reader.readtext_batched([images[i] for i in indexes])
+            for i, result in zip(indexes, batch_results):
+                results[i] = result
+
+        return results
+
+
+class ONNXBackend(OCRBackend):
+    """CRAFT-style text detection and CTC recognition on ONNX Runtime."""
+
+    name = "onnx"
+
+    def __init__(self, detector_path, recognizer_path, charset_path, threads=1,
+                 canvas_size=1280, text_threshold=0.7, low_text=0.4, link_threshold=0.4,
+                 min_size=10, line_height=64, batch_size=16):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        # Each worker process gets its own sessions, so keep them to a few cores
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = ["CPUExecutionProvider"]
+        self.detector = onnxruntime.InferenceSession(detector_path, options, providers=providers)
+        self.recognizer = onnxruntime.InferenceSession(recognizer_path, options, providers=providers)
+
+        with open(charset_path, encoding="utf-8") as f:
+            self.charset = f.read().rstrip("\r\n")
+
+        self.canvas_size = canvas_size
+        self.text_threshold = text_threshold
+        self.low_text = low_text
+        self.link_threshold = link_threshold
+        self.min_size = min_size
+        self.line_height = line_height
+
+        # Exported models may fix the batch size or crop width
+        shape = self.recognizer.get_inputs()[0].shape
+        self.batch_size = shape[0] if isinstance(shape[0], int) else batch_size
+        self.line_width = shape[3] if isinstance(shape[3], int) else None
+
+    def readtext(self, image):
+        image = load_image(image)
+        boxes = self.detect(image)
+        if not boxes:
+            return []
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return [(box, text, confidence) for box, (text, confidence) in zip(boxes, self.recognize(gray, boxes))]
+
+    def detect(self, image):
+        """Return axis-aligned text boxes, as four corners each, in ``image`` coordinates."""
+        height, width = image.shape[:2]
+        ratio = min(1.0, self.canvas_size / max(height, width))
+        target_h, target_w = round(height * ratio), round(width * ratio)
+        resized = cv2.resize(image, (target_w, target_h), interpolation=cv2.INTER_LINEAR) if ratio < 1.0 else image
+
+        # The network downsamples by 32, pad up to a multiple of it
+        padded = np.zeros((-(-target_h // 32) * 32, -(-target_w // 32) * 32, 3), dtype=np.float32)
+        padded[:target_h, :target_w] = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+        tensor = ((padded - DETECTOR_MEAN) / DETECTOR_STD).transpose(2, 0, 1)[None]
+
+        scores = self.detector.run(None, {self.detector.get_inputs()[0].name: tensor})[0][0]
+        if scores.shape[0] == 2:
+            scores = scores.transpose(1, 2, 0)
+        region, affinity = scores[..., 0], scores[..., 1]
+
+        # Score maps are at half the input resolution
+        scale = 2.0 / ratio
+        boxes = []
+        for x1, y1, x2, y2 in self._craft_boxes(region, affinity):
+            x1, y1 = max(0.0, float(x1) * scale), max(0.0, float(y1) * scale)
+            x2, y2 = min(float(width), float(x2) * scale), min(float(height), float(y2) * scale)
+            if x2 - x1 >= 1 and y2 - y1 >= 1:
+                boxes.append([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+        return boxes
+
+    def _craft_boxes(self, region, affinity):
+        """Word boxes ``(x1, y1, x2, y2)`` from CRAFT score maps, in map coordinates.
+
+        Region and affinity scores above their thresholds are joined into
+        connected components; each component with a confident enough
+        character is dilated in proportion to its size and boxed.
+        """
+        text_mask = region > self.low_text
+        link_mask = affinity > self.link_threshold
+        combined = (text_mask | link_mask).astype(np.uint8)
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(combined, connectivity=4)
+
+        map_h, map_w = region.shape
+        boxes = []
+        for k in range(1, count):
+            x, y, w, h, area = stats[k]
+            if area < self.min_size:
+                continue
+            window = (slice(y, y + h), slice(x, x + w))
+            component = labels[window] == k
+            if region[window][component].max() < self.text_threshold:
+                continue
+
+            # Affinity-only pixels link characters but aren't text themselves
+            segment = component & ~(link_mask[window] & ~text_mask[window])
+            if not segment.any():
+                continue
+            ys, xs = np.nonzero(segment)
+            grow = int(math.sqrt(area * min(w, h) / (w * h)) * 2)
+            boxes.append((
+                max(0, x + xs.min() - grow),
+                max(0, y + ys.min() - grow),
+                min(map_w, x + xs.max() + 1 + grow),
+                min(map_h, y + ys.max() + 1 + grow),
+            ))
+        return boxes
+
+    def recognize(self, gray, boxes):
+        """Return ``(text, confidence)`` for each box in the grayscale image."""
+        crops = []
+        for box in boxes:
+            (x1, y1), (x2, y2) = box[0], box[2]
+            crop = gray[int(y1):int(math.ceil(y2)), int(x1):int(math.ceil(x2))]
+            width = max(1, round(crop.shape[1] * self.line_height / crop.shape[0]))
+            if self.line_width:
+                width = min(width, self.line_width)
+            crops.append(cv2.resize(crop, (width, self.line_height), interpolation=cv2.INTER_CUBIC))
+
+        results = [None] * len(crops)
+        # Batch crops of similar width together to keep the padding small
+        order = sorted(range(len(crops)), key=lambda i: crops[i].shape[1])
+        input_name = self.recognizer.get_inputs()[0].name
+        for start in range(0, len(order), self.batch_size):
+            indexes = order[start:start + self.batch_size]
+            width = self.line_width or max(crops[i].shape[1] for i in indexes)
+            batch = np.empty((len(indexes), 1, self.line_height, width), dtype=np.float32)
+            for row, i in enumerate(indexes):
+                crop = crops[i]
+                batch[row, 0, :, :crop.shape[1]] = crop
+                # Pad by repeating the last column, as the models were trained
+                batch[row, 0, :, crop.shape[1]:] = crop[:, -1:]
+            batch = (batch / 255.0 - 0.5) / 0.5
+
+            logits = self.recognizer.run(None, {input_name: batch})[0]
+            for i, sequence in zip(indexes, logits):
+                results[i] = self._ctc_decode(sequence)
+        return results
+
+    def _ctc_decode(self, logits):
+        """Greedy CTC decoding of ``(T, classes)`` logits into text and confidence."""
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        best = probabilities.argmax(axis=1)
+        keep = best != 0
+        keep[1:] &= best[1:] != best[:-1]
+        indexes = best[keep]
+        if not len(indexes):
+            return "", 0.0
+
+        text = "".join(self.charset[i - 1] for i in indexes if i - 1 < len(self.charset))
+        chosen = probabilities[keep, indexes]
+        # The confidence easyocr reports, a length-normalized product
+        confidence = float(np.prod(chosen) ** (2.0 / math.sqrt(len(chosen))))
+        return text, confidence
+
+
+class StubBackend(OCRBackend):
+    """Deterministic readings for tests and offline benchmarks.
+
+    Replays the ``readtext`` output stored as JSON at ``path`` for every
+    image, or by default a fixed KTP reading laid out over the image.
+    """
+
+    name = "stub"
+
+    # (x1, y1, x2, y2) as fractions of the image size, text
+    SAMPLE = [
+        ((0.30, 0.03, 0.70, 0.09), "PROVINSI JAWA BARAT"),
+        ((0.36, 0.10, 0.64, 0.16), "KOTA BANDUNG"),
+        ((0.03, 0.19, 0.10, 0.24), "NIK"),
+        ((0.26, 0.19, 0.62, 0.24), ": 3273010101900001"),
+        ((0.03, 0.25, 0.12, 0.30), "Nama"),
+        ((0.26, 0.25, 0.52, 0.30), ": BUDI SANTOSO"),
+        ((0.03, 0.31, 0.22, 0.36), "Tempat/Tgl Lahir"),
+        ((0.26, 0.31, 0.58, 0.36), ": BANDUNG, 01-01-1990"),
+        ((0.03, 0.37, 0.17, 0.42), "Jenis Kelamin"),
+        ((0.26, 0.37, 0.42, 0.42), ": LAKI-LAKI"),
+        ((0.03, 0.43, 0.12, 0.48), "Alamat"),
+        ((0.26, 0.43, 0.55, 0.48), ": JL MERDEKA NO 10"),
+        ((0.03, 0.49, 0.11, 0.54), "RT/RW"),
+        ((0.26, 0.49, 0.38, 0.54), ": 001/002"),
+        ((0.03, 0.55, 0.13, 0.60), "Kel/Desa"),
+        ((0.26, 0.55, 0.40, 0.60), ": CITARUM"),
+        ((0.03, 0.61, 0.15, 0.66), "Kecamatan"),
+        ((0.26, 0.61, 0.44, 0.66), ": BANDUNG WETAN"),
+        ((0.03, 0.67, 0.11, 0.72), "Agama"),
+        ((0.26, 0.67, 0.36, 0.72), ": ISLAM"),
+        ((0.03, 0.73, 0.23, 0.78), "Status Perkawinan"),
+        ((0.26, 0.73, 0.40, 0.78), ": BELUM KAWIN"),
+        ((0.03, 0.79, 0.14, 0.84), "Pekerjaan"),
+        ((0.26, 0.79, 0.47, 0.84), ": KARYAWAN SWASTA"),
+        ((0.03, 0.85, 0.20, 0.90), "Kewarganegaraan"),
+        ((0.26, 0.85, 0.33, 0.90), ": WNI"),
+        ((0.03, 0.91, 0.19, 0.96), "Berlaku Hingga"),
+        ((0.26, 0.91, 0.45, 0.96), ": SEUMUR HIDUP"),
+    ]
+
+    def __init__(self, path=None):
+        self.result = None
+        if path:
+            with open(path, encoding="utf-8") as f:
+                self.result = [(box, text, confidence) for box, text, confidence in json.load(f)]
+
+    def readtext(self, image):
+        if self.result is not None:
+            return list(self.result)
+        height, width = load_image(image).shape[:2]
+        result = []
+        for (x1, y1, x2, y2), text in self.SAMPLE:
+            x1, x2, y1, y2 = x1 * width, x2 * width, y1 * height, y2 * height
+            result.append(([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], text, 1.0))
+        return result
+
+
+BACKENDS = {backend.name: backend for backend in (EasyOCRBackend, ONNXBackend, StubBackend)}
+
+
+def create_backend(name, options=None):
+    """Instantiate the backend registered as ``name`` with keyword ``options``."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend {name!r}, expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name](**(options or {}))
+
+
+def quantize_model(source, target):
+    """Write a copy of the ONNX model ``source`` with 8-bit weights, quantized dynamically."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    # The CPU ConvInteger kernel only takes unsigned 8-bit weights
+    quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
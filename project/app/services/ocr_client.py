@@ -0,0 +1,60 @@
+import json
+import socket
+import struct
+
+# Every message on the socket is a 4-byte big-endian length followed by the payload
+HEADER = struct.Struct(">I")
+
+
+def send_frame(sock, payload):
+    sock.sendall(HEADER.pack(len(payload)))
+    sock.sendall(payload)
+
+
+def recv_frame(sock):
+    header = _recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    return _recv_exact(sock, length)
+
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(min(size - len(buf), 1 << 20))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+class OCRServerError(Exception):
+    """Raised when the OCR server is unreachable or reports a failure."""
+
+
+class OCRClient:
+    """Send images to the shared OCR server over a Unix domain socket."""
+
+    def __init__(self, socket_path, timeout=60):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def readtext(self, image_bytes):
+        """Return ``readtext`` style results for an encoded image."""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                send_frame(sock, image_bytes)
+                response = recv_frame(sock)
+        except OSError as e:
+            raise OCRServerError(f"OCR server unavailable: {e}")
+
+        if response is None:
+            raise OCRServerError("OCR server closed the connection")
+
+        response = json.loads(response)
+        if "error" in response:
+            raise OCRServerError(response["error"])
+        return [(box, text, confidence) for box, text, confidence in response["result"]]
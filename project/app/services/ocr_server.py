@@ -0,0 +1,130 @@
+"""Shared OCR server.
+
+Holds a single OCR backend for every gunicorn worker on the box and
+batches requests that arrive close together. Run it next to the app::
+
+    python -m app.services.ocr_server --socket /tmp/cakrawala-ocr.sock
+"""
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+from app.services.ocr_client import recv_frame, send_frame
+from app.services import ocr_service
+from app.services.ocr_service import get_model, readtext_many
+
+
+class Batcher:
+    """Collect images for up to ``window`` seconds and OCR them together."""
+
+    def __init__(self, max_batch_size=8, window=0.02):
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="ocr-batcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, image):
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            images = [image for image, _ in batch]
+            try:
+                results = readtext_many(images)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class OCRRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # A client may send several images over one connection
+        while True:
+            payload = recv_frame(self.request)
+            if payload is None:
+                return
+
+            try:
+                image = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    raise ValueError("Could not decode image")
+                result = self.server.batcher.submit(image).result()
+                response = {"result": [_to_json(item) for item in result]}
+            except Exception as e:
+                response = {"error": str(e)}
+
+            send_frame(self.request, json.dumps(response).encode())
+
+
+class OCRServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, batcher):
+        self.batcher = batcher
+        super().__init__(socket_path, OCRRequestHandler)
+
+
+def _to_json(item):
+    box, text, confidence = item
+    return [[[float(x), float(y)] for x, y in box], text, float(confidence)]
+
+
+def serve(socket_path, max_batch_size, window):
+    # Load the model before accepting connections
+    get_model()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    batcher = Batcher(max_batch_size=max_batch_size, window=window)
+    batcher.start()
+
+    with OCRServer(socket_path, batcher) as server:
+        print(f"OCR server listening on {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Shared OCR inference server")
+    parser.add_argument("--socket", default=Config.OCR_SOCKET_PATH)
+    parser.add_argument("--batch-size", type=int, default=Config.OCR_BATCH_SIZE)
+    parser.add_argument("--batch-window-ms", type=float, default=Config.OCR_BATCH_WINDOW_MS)
+    parser.add_argument("--backend", choices=sorted(Config.OCR_BACKEND_OPTIONS), default=Config.OCR_BACKEND)
+    args = parser.parse_args()
+
+    ocr_service.settings.update(backend=args.backend, backend_options=Config.OCR_BACKEND_OPTIONS[args.backend])
+
+    serve(args.socket, args.batch_size, args.batch_window_ms / 1000)
@@ -1,145 +1,239 @@
-import easyocr
+import cv2
+import numpy as np
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-
-# Initialize the OCR model (do this once)
-model = easyocr.Reader(['id'])
+from app.metrics import metrics
+from app.services import card_layout, vocabulary
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.ocr_backends import create_backend
+from app.services.ocr_client import OCRClient
+
+# OCR settings, overridden from the app config by init_app
+settings = {
+    # In-process engine, see app/services/ocr_backends.py
+    'backend': 'easyocr',
+    'backend_options': {},
+    'mode': 'local',
+    'socket_path': None,
+    'timeout': 60,
+    # Tiered OCR: a pass on a copy no larger than fast_max_side, then full
+    # resolution only when a required field is missing or below min_confidence
+    'tiered': True,
+    'fast_max_side': 640,
+    'min_confidence': 0.5,
+    'required_fields': ('nik', 'nama', 'tempat_tgl_lahir'),
+}
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def init_app(app):
+    settings['backend'] = app.config['OCR_BACKEND']
+    settings['backend_options'] = app.config['OCR_BACKEND_OPTIONS'].get(settings['backend'], {})
+    settings['mode'] = app.config['OCR_MODE']
+    settings['socket_path'] = app.config['OCR_SOCKET_PATH']
+    settings['timeout'] = app.config['OCR_TIMEOUT']
+    settings['tiered'] = app.config['OCR_TIERED']
+    settings['fast_max_side'] = app.config['OCR_FAST_MAX_SIDE']
+    settings['min_confidence'] = app.config['OCR_MIN_CONFIDENCE']
+
+
+def get_model():
+    """Return the in-process OCR backend, loading it once on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = create_backend(settings['backend'], settings['backend_options'])
+    return _model
+
+
+def warm_up():
+    """Load the OCR model (or reach the OCR server) and run one dummy inference."""
+    image = np.full((64, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "NIK 1234", (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    readtext(image)
+
+
+def readtext_many(images):
+    """Run OCR over decoded images, batched as far as the backend allows."""
+    return get_model().readtext_many(images)
+
+
+def readtext(image, image_bytes=None):
+    """Run OCR on an image path or array, locally or through the shared OCR server.
+
+    ``image_bytes`` is the encoded original, sent as-is to the OCR server
+    so the image doesn't have to be re-encoded.
+    """
+    if settings['mode'] == 'sidecar':
+        if image_bytes is None and isinstance(image, str):
+            with open(image, 'rb') as f:
+                image_bytes = f.read()
+        elif image_bytes is None:
+            image_bytes = cv2.imencode('.png', image)[1].tobytes()
+        return OCRClient(settings['socket_path'], settings['timeout']).readtext(image_bytes)
+    return get_model().readtext(image)
 
 
 class OCRTextProcessor:
-    def __init__(self, tolerance=15):
-        self.tolerance = tolerance
+    """Group OCR word boxes into reading-order lines.
 
-    def process_ocr_result(self, result):
-        """Process OCR result and return corrected text alignments."""
-        # Extract all words with their coordinates and text
-        words = []
-        for item in result:
-            coords_raw, text, confidence = item
-            x1, y1 = coords_raw[0]  # Top-left
-            x2, y2 = coords_raw[2]  # Bottom-right
-            words.append({
-                'text': text,
-                'coords': {
-                    'y1': float(y1),
-                    'y2': float(y2),
-                    'x1': float(x1),
-                    'x2': float(x2)
-                }
-            })
-
-        # Sort words by y-coordinate first
-        words.sort(key=lambda x: x["coords"]["y1"])
-
-        # Group words that are on the same line
-        lines = []
-        current_line = [words[0]] if words else []
-
-        for word in words[1:]:
-            last_word = current_line[-1] if current_line else None
-
-            if last_word and self._is_same_line(last_word["coords"], word["coords"]):
-                current_line.append(word)
-            else:
-                if current_line:
-                    # Sort words in the line by x-coordinate before adding to lines
-                    current_line.sort(key=lambda x: x["coords"]["x1"])
-                    lines.append(current_line)
-                current_line = [word]
-
-        if current_line:
-            # Sort the last line by x-coordinate
-            current_line.sort(key=lambda x: x["coords"]["x1"])
-            lines.append(current_line)
-
-        # Convert grouped words to text
-        formatted_text = []
-        for line in lines:
-            line_text = " ".join(word["text"] for word in line)
-            formatted_text.append(line_text)
+    Boxes are kept in NumPy arrays. The page skew is estimated from the
+    slope between each word and its right-hand neighbour, the box centres
+    are rotated upright and lines are cut wherever the gap between sorted
+    centres exceeds ``tolerance_factor`` of the median word height, so the
+    result doesn't depend on the order the boxes come in.
+    """
 
-        return formatted_text
+    def __init__(self, tolerance=15, tolerance_factor=0.75, max_skew=15.0, max_skew_samples=128):
+        self.tolerance = tolerance
+        self.tolerance_factor = tolerance_factor
+        # Skew estimates beyond this many degrees are treated as noise
+        self.max_skew = max_skew
+        self.max_skew_samples = max_skew_samples
 
-    def _is_same_line(self, coords1, coords2, tolerance_factor=0.5):
-        """
-        Check if two words are on the same line based on vertical coordinates
-        Using a tolerance factor relative to text height
+    def process_ocr_result(self, result, structured=False):
+        """Process OCR result and return corrected text alignments.
+
+        With ``structured`` each line is a dict with its ``text``, the lowest
+        word ``confidence`` and the ``box`` ``(x1, y1, x2, y2)`` around it.
         """
-        height1 = coords1["y2"] - coords1["y1"]
-        height2 = coords2["y2"] - coords2["y1"]
-        avg_height = (height1 + height2) / 2
+        if not len(result):
+            return []
+
+        texts = [item[1] for item in result]
+        points = np.array([item[0] for item in result], dtype=np.float64).reshape(-1, 4, 2)
+        confidences = np.array([item[2] for item in result], dtype=np.float64)
+
+        lows = points.min(axis=1)
+        highs = points.max(axis=1)
+        centers = (lows + highs) / 2
+        heights = highs[:, 1] - lows[:, 1]
+
+        # Rotate the centres so text lines run horizontally
+        angle = self.estimate_skew(lows, highs)
+        cos, sin = np.cos(angle), np.sin(angle)
+        across = centers[:, 0] * cos + centers[:, 1] * sin
+        down = centers[:, 1] * cos - centers[:, 0] * sin
+
+        # Cut the sorted baselines into lines at gaps wider than the tolerance
+        by_height = np.argsort(down, kind="stable")
+        gaps = np.diff(down[by_height])
+        tolerance = self.tolerance_factor * max(float(np.median(heights)), 1.0)
+        line_ids = np.empty(len(texts), dtype=np.intp)
+        line_ids[by_height] = np.concatenate(([0], np.cumsum(gaps >= tolerance)))
+
+        # Reading order: line by line, left to right within a line
+        order = np.lexsort((across, line_ids))
+        starts = np.flatnonzero(np.diff(line_ids[order], prepend=-1))
+        ends = np.append(starts[1:], len(order))
+        lines = [" ".join(texts[i] for i in order[a:b]) for a, b in zip(starts, ends)]
+
+        if not structured:
+            return lines
+
+        line_confidence = np.minimum.reduceat(confidences[order], starts)
+        line_lows = np.minimum.reduceat(lows[order], starts)
+        line_highs = np.maximum.reduceat(highs[order], starts)
+        return [
+            {
+                'text': text,
+                'confidence': float(confidence),
+                'box': (float(low[0]), float(low[1]), float(high[0]), float(high[1])),
+            }
+            for text, confidence, low, high in zip(lines, line_confidence, line_lows, line_highs)
+        ]
 
-        mid1 = (coords1["y1"] + coords1["y2"]) / 2
-        mid2 = (coords2["y1"] + coords2["y2"]) / 2
+    def estimate_skew(self, lows, highs):
+        """Return the page skew in radians from word boxes given as corner arrays.
 
-        return abs(mid1 - mid2) < (avg_height * tolerance_factor)
+        Each word is paired with the nearest word that starts to its right
+        within a few word heights and overlaps it vertically, and a line is
+        fitted through the pairs. Past ``max_skew_samples`` words only an
+        evenly spread sample is paired, keeping this linear.
+        """
+        count = len(lows)
+        if count < 2:
+            return 0.0
+        centers = (lows + highs) / 2
+        heights = np.maximum(highs[:, 1] - lows[:, 1], 1.0)
+
+        rows = np.arange(count)
+        if count > self.max_skew_samples:
+            # Spread over the page in position order, whatever the input order
+            step = -(-count // self.max_skew_samples)
+            rows = np.lexsort((centers[:, 1], centers[:, 0]))[::step]
+
+        # Gap from the end of each sampled word to the start of every word
+        gap = lows[None, :, 0] - highs[rows, None, 0]
+        rise = centers[None, :, 1] - centers[rows, None, 1]
+        reach = heights[rows, None]
+        candidate = (gap > -reach / 2) & (gap < 3 * reach) & (np.abs(rise) < reach)
+        candidate[np.arange(len(rows)), rows] = False
+
+        gap = np.where(candidate, gap, np.inf)
+        neighbour = gap.argmin(axis=1)
+        paired = np.isfinite(gap[np.arange(len(rows)), neighbour])
+        if not paired.any():
+            return 0.0
+
+        rows, neighbour = rows[paired], neighbour[paired]
+        run = np.maximum(centers[neighbour, 0] - centers[rows, 0], 1.0)
+        rise = centers[neighbour, 1] - centers[rows, 1]
+        # Drop pairs that straddle two lines, then fit the rest by least squares
+        inliers = np.abs(rise - np.median(rise / run) * run) < heights[rows] / 2
+        run, rise = run[inliers], rise[inliers]
+        if len(run) < 3:
+            return 0.0
+        slope = run @ rise / (run @ run)
+        residuals = rise - slope * run
+        standard_error = np.sqrt(residuals @ residuals / (len(run) - 1) / (run @ run))
+
+        # A slope within the box jitter is no evidence of skew
+        angle = float(np.arctan(slope))
+        if abs(slope) < 2 * standard_error or abs(angle) > np.radians(self.max_skew):
+            return 0.0
+        return angle
+
+
+# Fields with their keywords and tolerance levels
+KTP_FIELDS = [
+    {'name': 'provinsi', 'keywords': ['provinsi'], 'tolerance': 2},
+    {'name': 'kabupaten', 'keywords': ['kabupaten', 'kota'], 'tolerance': 2},
+    {'name': 'nik', 'keywords': ['nik'], 'tolerance': 1},
+    {'name': 'nama', 'keywords': ['nama'], 'tolerance': 1},
+    {'name': 'tempat_tgl_lahir', 'keywords': ['tempat/tgl', 'tempat/tgilahir', 'tempat','tompat/tgllah'], 'tolerance': 3},
+    # {'name': 'tanggal_lahir', 'keywords': ['tgl', 'tanggal'], 'tolerance': 2},
+    {'name': 'jenis_kelamin', 'keywords': ['jenis kelamin', 'kelamin'], 'tolerance': 2},
+    {'name': 'alamat', 'keywords': ['alamat'], 'tolerance': 2},
+    {'name': 'rt_rw', 'keywords': ['rt/rw', 'rtrw'], 'tolerance': 2},
+    {'name': 'kel_desa', 'keywords': ['kel/desa', 'kelurahan', 'desa'], 'tolerance': 2},
+    {'name': 'kecamatan', 'keywords': ['kecamatan', 'kec'], 'tolerance': 3},
+    {'name': 'agama', 'keywords': ['agama'], 'tolerance': 2},
+    {'name': 'status_perkawinan', 'keywords': ['status perkawinan', 'perkawinan'], 'tolerance': 3},
+    {'name': 'pekerjaan', 'keywords': ['pekerjaan', 'kerja'], 'tolerance': 3},
+    {'name': 'kewarganegaraan', 'keywords': ['kewarganegaraan'], 'tolerance': 4},
+    {'name': 'berlaku_hingga', 'keywords': ['berlaku hingga', 'hingga'], 'tolerance': 3}
+]
+
+metrics.define('ocr_escalations_total', 'counter', 'Tiered OCR runs that needed a full-resolution pass')
+
+# Compiled once per process and shared by every extractor
+_ktp_matcher = KeywordMatcher(KTP_FIELDS)
 
 
 class TextEntityExtractor:
     def __init__(self):
-        # Define fields with their keywords and tolerance levels
-        self.fields = [
-            {'name': 'provinsi', 'keywords': ['provinsi'], 'tolerance': 2},
-            {'name': 'kabupaten', 'keywords': ['kabupaten', 'kota'], 'tolerance': 2},
-            {'name': 'nik', 'keywords': ['nik'], 'tolerance': 1},
-            {'name': 'nama', 'keywords': ['nama'], 'tolerance': 1},
-            {'name': 'tempat_tgl_lahir', 'keywords': ['tempat/tgl', 'tempat/tgilahir', 'tempat','tompat/tgllah'], 'tolerance': 3},
-            # {'name': 'tanggal_lahir', 'keywords': ['tgl', 'tanggal'], 'tolerance': 2},
-            {'name': 'jenis_kelamin', 'keywords': ['jenis kelamin', 'kelamin'], 'tolerance': 2},
-            {'name': 'alamat', 'keywords': ['alamat'], 'tolerance': 2},
-            {'name': 'rt_rw', 'keywords': ['rt/rw', 'rtrw'], 'tolerance': 2},
-            {'name': 'kel_desa', 'keywords': ['kel/desa', 'kelurahan', 'desa'], 'tolerance': 2},
-            {'name': 'kecamatan', 'keywords': ['kecamatan', 'kec'], 'tolerance': 3},
-            {'name': 'agama', 'keywords': ['agama'], 'tolerance': 2},
-            {'name': 'status_perkawinan', 'keywords': ['status perkawinan', 'perkawinan'], 'tolerance': 3},
-            {'name': 'pekerjaan', 'keywords': ['pekerjaan', 'kerja'], 'tolerance': 3},
-            {'name': 'kewarganegaraan', 'keywords': ['kewarganegaraan'], 'tolerance': 4},
-            {'name': 'berlaku_hingga', 'keywords': ['berlaku hingga', 'hingga'], 'tolerance': 3}
-        ]
-
-    def levenshtein_distance(self, s1, s2):
-        """Calculate the Levenshtein distance between two strings"""
-        if len(s1) < len(s2):
-            return self.levenshtein_distance(s2, s1)
-
-        if len(s2) == 0:
-            return len(s1)
-
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-
-        return previous_row[-1]
+        self.fields = KTP_FIELDS
+        self.matcher = _ktp_matcher
 
     def find_field_match(self, line):
         """Find matching field for a line based on Levenshtein distance"""
-        words = line.lower().split()
-        if not words:
-            return None
-
-        best_match = None
-        min_distance = float('inf')
-        
-        for field in self.fields:
-            for keyword in field['keywords']:
-                keyword_parts = keyword.lower().split()
-                
-                # Try matching with first word(s) of line
-                for i in range(min(len(words), len(keyword_parts) + 1)):
-                    line_part = ' '.join(words[:i+1])
-                    distance = self.levenshtein_distance(line_part, keyword)
-                    
-                    if distance < min_distance and distance <= field['tolerance']:
-                        min_distance = distance
-                        best_match = field
-
-        return best_match
+        return self.matcher.find_field_match(line)
 
     def extract_value(self, line, field):
         """Extract value from a line based on field type"""
@@ -147,12 +241,7 @@ class TextEntityExtractor:
         parts = line.split()
         
         # Find where the field name ends
-        field_end = 0
-        for i, part in enumerate(parts):
-            for keyword in field['keywords']:
-                if self.levenshtein_distance(part.lower(), keyword.lower()) <= field['tolerance']:
-                    field_end = i + 1
-                    break
+        field_end = self.matcher.value_start(parts, field)
         
         # Extract value portion
         value = ' '.join(parts[field_end:]).strip()
@@ -164,17 +253,29 @@ class TextEntityExtractor:
 
     def extract_entities(self, lines):
         """Extract entities from list of lines"""
+        entities, _ = self.extract_fields({'text': line} for line in lines)
+        return entities
+
+    def extract_fields(self, lines):
+        """Extract entities from structured lines.
+
+        Returns ``(entities, details)`` where ``details`` maps each field to
+        the lowest ``confidence`` and the union ``box`` of the lines it was
+        read from (when the lines carry them).
+        """
         entities = {}
-        
+        details = {}
+
         for line in lines:
+            text = line['text']
             # Skip empty lines
-            if not line.strip():
+            if not text.strip():
                 continue
-            
+
             # Find matching field
-            field = self.find_field_match(line)
+            field = self.find_field_match(text)
             if field:
-                value = self.extract_value(line, field)
+                value = self.extract_value(text, field)
                 if value:
                     # Special handling for fields that might have multiple parts
                     if field['name'] in entities:
@@ -184,8 +285,24 @@ class TextEntityExtractor:
                             entities[field['name']] = [entities[field['name']], value]
                     else:
                         entities[field['name']] = value
+                    _merge_detail(details, field['name'], line)
 
-        return entities
+        return entities, details
+
+
+def _merge_detail(details, name, line):
+    if 'confidence' not in line:
+        return
+    detail = details.get(name)
+    if detail is None:
+        details[name] = {'confidence': line['confidence'], 'box': line['box']}
+        return
+    box = detail['box']
+    detail['confidence'] = min(detail['confidence'], line['confidence'])
+    detail['box'] = (
+        min(box[0], line['box'][0]), min(box[1], line['box'][1]),
+        max(box[2], line['box'][2]), max(box[3], line['box'][3]),
+    )
 
 
 def preprocess_text(text):
@@ -199,13 +316,6 @@ def preprocess_text(text):
     text = text.strip()
     return text
 
-def count_matching_chars(a, char):
-        count = 0
-        for c in char:
-            if c in a:
-                count += 1
-        return count
-
 def extract_date_and_place(tempat_tgl_lahir):
         # Regular expression to find 'DD MM YYYY' in the text
         date_match = re.search(r'\b\d{2}\s\d{2}\s\d{4}\b', tempat_tgl_lahir)
@@ -224,25 +334,28 @@ def extract_date_and_place(tempat_tgl_lahir):
         return formatted_date, place
 
 def correct_agama(agama):
-    target_words = ["ISLAM", "KRISTEN", "KATOLIK", "HINDU", "BUDDHA", "KONGHUCU"]
-    agama = agama.lower()
-    match_scores = {word: count_matching_chars(agama, word.lower()) for word in target_words}
-    most_likely_agama = max(match_scores, key=match_scores.get)
-    return most_likely_agama
+    return vocabulary.AGAMA.lookup(agama)
 
 def correct_jenis_kelamin(jenis_kelamin):
-    target_words = ["LAKI-LAKI", "PEREMPUAN"]
-    jenis_kelamin = jenis_kelamin.lower()
-    match_scores = {word: count_matching_chars(jenis_kelamin, word.lower()) for word in target_words}
-    most_likely_jenis_kelamin = max(match_scores, key=match_scores.get)
-    return most_likely_jenis_kelamin
+    return vocabulary.JENIS_KELAMIN.lookup(jenis_kelamin)
 
 def correct_status_perkawinan(status_perkawinan):
-    target_words = ["KAWIN", "BELUM KAWIN", "CERAI HIDUP", "CERAI MATI"]
-    status_perkawinan = status_perkawinan.lower()
-    match_scores = {word: count_matching_chars(status_perkawinan, word.lower()) for word in target_words}
-    most_likely_status_perkawinan = max(match_scores, key=match_scores.get)
-    return most_likely_status_perkawinan
+    return vocabulary.STATUS_PERKAWINAN.lookup(status_perkawinan)
+
+# Entity field for each gazetteer level
+REGION_FIELDS = {
+    'province': 'provinsi',
+    'regency': 'kabupaten',
+    'district': 'kecamatan',
+    'village': 'kel_desa',
+}
+
+def correct_regions(data):
+    """Replace region names with their nearest gazetteer entries, in place."""
+    values = {level: data[field] for level, field in REGION_FIELDS.items() if isinstance(data.get(field), str)}
+    if values:
+        for level, name in vocabulary.get_gazetteer().resolve(values).items():
+            data[REGION_FIELDS[level]] = name
 
 def post_processing(data):
     if 'jenis_kelamin' in data:
@@ -251,6 +364,7 @@ def post_processing(data):
         data['agama'] = correct_agama(data['agama'])
     if 'status_perkawinan' in data:
         data['status_perkawinan'] = correct_status_perkawinan(data['status_perkawinan'])
+    correct_regions(data)
     if 'tempat_tgl_lahir' in data:
         extracted_date, extracted_place = extract_date_and_place(data['tempat_tgl_lahir'])
         data['tanggal_lahir'] = extracted_date
@@ -258,12 +372,8 @@ def post_processing(data):
     return data
 
 
-def extract_id_card(image_path):
-    # Read image and pass it to the OCR model
-    # single_img_doc = DocumentFile.from_images(image_path)
-    # result = model(single_img_doc)
-    ocr_export = model.readtext(image_path)
-
+def parse_ocr_result(ocr_export):
+    """Turn raw ``readtext`` output into post-processed KTP entities."""
     # Process the OCR results
     processor = OCRTextProcessor()
     formatted_text = processor.process_ocr_result(ocr_export)
@@ -275,3 +385,159 @@ def extract_id_card(image_path):
 
     # Post-process entities
     return post_processing(entities)
+
+
+def prepare_card(image, image_bytes=None, face_box=None, corners=card_layout.UNSEARCHED):
+    """Rectify the card and blank its photo column before OCR.
+
+    Returns the image and encoded bytes to OCR; the bytes are dropped when
+    the image changed, so the sidecar gets the prepared card instead.
+    ``corners`` is the card outline if the quality gate already located it.
+    """
+    if not card_layout.settings["enabled"]:
+        return image, image_bytes
+    with metrics.stage("card_layout"):
+        card, _ = card_layout.rectify(image, face_box, corners)
+    return card, None
+
+
+def parse_ocr_fields(ocr_export):
+    """Like parse_ocr_result, but before post-processing and with per-field details."""
+    lines = OCRTextProcessor().process_ocr_result(ocr_export, structured=True)
+    for line in lines:
+        line['text'] = preprocess_text(line['text'])
+    return TextEntityExtractor().extract_fields(lines)
+
+
+def _downscale(image):
+    """Return the fast-tier copy of ``image`` and its scale factor."""
+    height, width = image.shape[:2]
+    scale = min(1.0, settings['fast_max_side'] / max(height, width))
+    if scale == 1.0:
+        return image, scale
+    small = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def _weak_fields(entities, details):
+    return [
+        name for name in settings['required_fields']
+        if name not in entities or details.get(name, {}).get('confidence', 0.0) < settings['min_confidence']
+    ]
+
+
+def _escalation_region(image, details, weak, scale):
+    """Full-resolution crop around the lines of ``weak`` fields, or None for the whole image.
+
+    Only possible when every weak field was read in the fast pass; missing
+    ones could be anywhere.
+    """
+    if any(name not in details for name in weak):
+        return None
+    top = min(details[name]['box'][1] for name in weak) / scale
+    bottom = max(details[name]['box'][3] for name in weak) / scale
+    # One line height of margin so the grouping sees whole lines
+    margin = max((details[name]['box'][3] - details[name]['box'][1]) / scale for name in weak)
+    top = max(0, int(top - margin))
+    bottom = min(image.shape[0], int(bottom + margin) + 1)
+    return image[top:bottom]
+
+
+def _resolve_tiers(image, image_bytes, fast_export, scale):
+    """Parse the fast pass and rerun OCR at full resolution if required fields are weak.
+
+    Returns post-processed entities with ``ocr_tiers`` naming the tier
+    (``fast`` or ``full``) that produced each field.
+    """
+    with metrics.stage('ocr_parse'):
+        entities, details = parse_ocr_fields(fast_export)
+    tier = 'fast' if scale < 1.0 else 'full'
+    tiers = {name: tier for name in entities}
+
+    weak = _weak_fields(entities, details) if scale < 1.0 else []
+    if weak:
+        metrics.inc('ocr_escalations_total')
+        region = _escalation_region(image, details, weak, scale)
+        with metrics.stage('ocr_full'):
+            if region is None:
+                full_export = readtext(image, image_bytes)
+            else:
+                full_export = readtext(region)
+        with metrics.stage('ocr_parse'):
+            full_entities, full_details = parse_ocr_fields(full_export)
+
+        # Weak fields take the full-resolution reading when it is at least as
+        # confident; after a whole-image pass, missing fields are filled too
+        candidates = set(weak) if region is not None else set(weak) | (set(full_entities) - set(entities))
+        for name in candidates:
+            if name not in full_entities:
+                continue
+            if name in entities and full_details[name]['confidence'] < details[name]['confidence']:
+                continue
+            entities[name] = full_entities[name]
+            tiers[name] = 'full'
+
+    entities = post_processing(entities)
+    if 'tempat_tgl_lahir' in tiers:
+        tiers['tempat_lahir'] = tiers['tanggal_lahir'] = tiers['tempat_tgl_lahir']
+    entities['ocr_tiers'] = tiers
+    return entities
+
+
+def extract_id_card(image, image_bytes=None, face_box=None, corners=card_layout.UNSEARCHED):
+    """Extract KTP entities from a decoded image.
+
+    ``face_box`` is the ``(x, y, w, h)`` box from face detection, blanked
+    out before OCR, and ``corners`` the card outline from the quality gate.
+    In tiered mode OCR runs on a downscaled copy first and only falls back
+    to full resolution for weak required fields.
+    """
+    image, image_bytes = prepare_card(image, image_bytes, face_box, corners)
+
+    if settings['tiered']:
+        small, scale = _downscale(image)
+        with metrics.stage("ocr_fast"):
+            fast_export = readtext(small, image_bytes if scale == 1.0 else None)
+        return _resolve_tiers(image, image_bytes, fast_export, scale)
+
+    # Pass the decoded image to the OCR model
+    with metrics.stage("ocr"):
+        ocr_export = readtext(image, image_bytes)
+    with metrics.stage("ocr_parse"):
+        return parse_ocr_result(ocr_export)
+
+
+def _readtext_all(images, image_bytes):
+    if settings['mode'] == 'sidecar':
+        # The OCR server batches requests that arrive together
+        with ThreadPoolExecutor(max_workers=len(images) or 1) as executor:
+            return list(executor.map(readtext, images, image_bytes))
+    return readtext_many(images)
+
+
+def extract_id_cards(images, image_bytes=None, face_boxes=None, card_corners=None):
+    """Extract entities from several decoded images with batched inference."""
+    image_bytes = image_bytes or [None] * len(images)
+    face_boxes = face_boxes or [None] * len(images)
+    card_corners = card_corners or [card_layout.UNSEARCHED] * len(images)
+    prepared = [prepare_card(*args) for args in zip(images, image_bytes, face_boxes, card_corners)]
+    images = [image for image, _ in prepared]
+    image_bytes = [data for _, data in prepared]
+
+    if settings['tiered']:
+        downscaled = [_downscale(image) for image in images]
+        with metrics.stage("ocr_batch"):
+            fast_exports = _readtext_all(
+                [small for small, _ in downscaled],
+                [data if scale == 1.0 else None for (_, scale), data in zip(downscaled, image_bytes)],
+            )
+        # Escalations, if any, run one image at a time
+        return [
+            _resolve_tiers(image, data, fast_export, scale)
+            for image, data, fast_export, (_, scale) in zip(images, image_bytes, fast_exports, downscaled)
+        ]
+
+    with metrics.stage("ocr_batch"):
+        ocr_exports = _readtext_all(images, image_bytes)
+    with metrics.stage("ocr_parse"):
+        return [parse_ocr_result(ocr_export) for ocr_export in ocr_exports]
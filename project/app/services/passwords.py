@@ -0,0 +1,52 @@
+import hmac
+import threading
+from werkzeug.security import check_password_hash, generate_password_hash
+
+settings = {"method": "scrypt:32768:8:1", "prefix": "scrypt:32768:8:1"}
+
+# Caps how many requests in this worker hash at once, created by init_app.
+# Callers still block for their own hash; the cap only keeps a burst of
+# logins from taking every CPU away from the other requests.
+_hash_slots = None
+
+# Checked when the account doesn't exist, so unknown emails take as long
+_dummy_hash = None
+
+
+def init_app(app):
+    global _hash_slots, _dummy_hash
+    settings["method"] = app.config["PASSWORD_HASH_METHOD"]
+    _hash_slots = threading.BoundedSemaphore(app.config["PASSWORD_HASH_WORKERS"])
+    _dummy_hash = hash_password("not-a-password")
+    # Werkzeug fills in default parameters, e.g. "scrypt" -> "scrypt:32768:8:1",
+    # so take the prefix from a real hash rather than the configured string
+    settings["prefix"] = _dummy_hash.split("$", 1)[0]
+
+
+def _is_hashed(stored):
+    # Werkzeug hashes look like "method$salt$hash"; older rows hold plaintext
+    return stored.count("$") == 2 and stored.split("$", 1)[0].split(":", 1)[0] in ("scrypt", "pbkdf2")
+
+
+def hash_password(password):
+    with _hash_slots:
+        return generate_password_hash(password, settings["method"])
+
+
+def verify_password(stored, password):
+    """Return ``(matches, needs_rehash)`` for a stored password.
+
+    ``needs_rehash`` is true for legacy plaintext rows and for hashes made
+    with a different method or work factor than the configured one.
+    """
+    if not _is_hashed(stored):
+        return hmac.compare_digest(stored.encode(), password.encode()), True
+
+    with _hash_slots:
+        matches = check_password_hash(stored, password)
+    return matches, matches and stored.split("$", 1)[0] != settings["prefix"]
+
+
+def burn_verify(password):
+    """Spend the same time as a real check when there is no account to check."""
+    verify_password(_dummy_hash, password)
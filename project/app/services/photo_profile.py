@@ -1,42 +1,76 @@
 import cv2
-from PIL import Image
 import os
+import threading
 
 cascade_path = os.path.join(os.path.dirname(__file__), "haarcascade_frontalface_default.xml")
 
-# Extract face from image
-def extract_face(image_path):
-    # Load the cascade
-    face_cascade = cv2.CascadeClassifier(cascade_path)
+# Face detection profile, overridden from the app config by init_app
+settings = {
+    "scale_factor": 1.1,
+    "min_neighbors": 2,
+    "min_size": (40, 60),
+    # Detection runs on a copy whose longest side is at most this many pixels
+    "max_side": 800,
+}
 
-    # Load the image
-    image = cv2.imread(image_path)
-    image_crop = Image.open(image_path)
+# CascadeClassifier is not safe to share between threads, so each thread
+# (request thread or extraction worker) keeps its own instance
+_local = threading.local()
+
+
+def get_face_cascade():
+    """Return this thread's face detector, loading the cascade XML on first use."""
+    face_cascade = getattr(_local, "face_cascade", None)
+    if face_cascade is None:
+        face_cascade = _local.face_cascade = cv2.CascadeClassifier(cascade_path)
+    return face_cascade
+
+def init_app(app):
+    settings.update(app.config["FACE_DETECTION"])
+
+
+def detect_faces(image, profile=None):
+    """Detect faces on a downscaled copy and return full-resolution boxes."""
+    profile = {**settings, **(profile or {})}
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-    # Detect faces
-    faces = face_cascade.detectMultiScale(
+    height, width = gray.shape
+    scale = min(1.0, profile["max_side"] / max(height, width))
+    if scale < 1.0:
+        gray = cv2.resize(gray, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+    min_w, min_h = profile["min_size"]
+    faces = get_face_cascade().detectMultiScale(
         gray,
-        scaleFactor=1.1,
-        minNeighbors=2,
-        minSize=(40, 60),
+        scaleFactor=profile["scale_factor"],
+        minNeighbors=profile["min_neighbors"],
+        minSize=(max(1, round(min_w * scale)), max(1, round(min_h * scale))),
         flags=cv2.CASCADE_SCALE_IMAGE
     )
 
+    # Map the boxes back to the original image
+    return [tuple(round(v / scale) for v in face) for face in faces]
+
+
+def find_face(image, profile=None):
+    """Return the padded ``(x, y, w, h)`` box of the single face in ``image``, or None."""
+    # Detect faces
+    faces = detect_faces(image, profile)
+
     # Check if faces are detected
     if len(faces) == 0 or len(faces) > 1:
         print("No faces detected!")
         return None
 
     # Process the first detected face
-    x, y, w, h = faces[0]
+    return pad_box(image, faces[0])
+
 
-    # Crop the face with padding
-    padding = 20
+def pad_box(image, box, padding=20):
+    """Grow a face box by ``padding`` pixels on each side, clipped to ``image``."""
+    x, y, w, h = box
     left = max(x - padding, 0)
     top = max(y - padding, 0)
-    right = min(x + w + padding, image_crop.width)
-    bottom = min(y + h + padding, image_crop.height)
-
-    im_crop = image_crop.crop((left, top, right, bottom))
-    return im_crop
\ No newline at end of file
+    right = min(x + w + padding, image.shape[1])
+    bottom = min(y + h + padding, image.shape[0])
+    return left, top, right - left, bottom - top
@@ -0,0 +1,52 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProfileCache:
+    """Serialized ``GET /profile/<user_id>`` responses with their ETags.
+
+    Entries are dropped when the profile is written in this process and
+    expire after ``ttl`` seconds, which bounds staleness across workers.
+    """
+
+    def __init__(self):
+        self.ttl = 10
+        self.max_entries = 1024
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config["PROFILE_CACHE_TTL"]
+        self.max_entries = app.config["PROFILE_CACHE_SIZE"]
+
+    def get(self, user_id):
+        """Return ``(body, etag)`` for a cached response, or None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            created_at, body, etag = entry
+            if time.monotonic() - created_at >= self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return body, etag
+
+    def set(self, user_id, body):
+        """Cache a serialized response and return its ETag."""
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), body, etag)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+profile_cache = ProfileCache()
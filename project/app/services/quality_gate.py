@@ -0,0 +1,104 @@
+"""Cheap checks that reject unusable ID card photos before face detection and OCR.
+
+Sharpness, exposure, glare and card presence are measured on a small
+grayscale copy in a few milliseconds. The face count comes last, from the
+same detection the face crop uses, so it adds no extra work.
+"""
+import cv2
+
+from app.metrics import metrics
+from app.services import card_layout
+from app.services.photo_profile import detect_faces
+
+# Gate thresholds, overridden from the app config by init_app
+settings = {
+    "enabled": True,
+    # Checks run on a copy whose longest side is at most this many pixels
+    "max_side": 480,
+    # Variance of the Laplacian below this means the photo is blurred
+    "min_sharpness": 60.0,
+    # Mean gray level range for a usable exposure
+    "min_brightness": 40.0,
+    "max_brightness": 225.0,
+    # Largest share of blown-out (>= 250) pixels
+    "max_glare": 0.08,
+    "require_card": True,
+    "require_face": True,
+}
+
+MESSAGES = {
+    "blurry": "The photo is blurred. Hold the camera steady and make sure the card is in focus.",
+    "too_dark": "The photo is too dark. Take it in a brighter place.",
+    "too_bright": "The photo is overexposed. Avoid direct light on the card.",
+    "glare": "There is glare on the card. Tilt the card or move away from the light source.",
+    "no_card": "No ID card found. Place the whole card in the frame against a plain background.",
+    "face_count": "The card photo must show exactly one face.",
+}
+
+metrics.define("quality_rejections_total", "counter", "Uploads rejected by the quality gate, by first reason")
+
+
+def init_app(app):
+    settings.update(app.config["QUALITY_GATE"])
+
+
+def _problem(code, value, limit):
+    return {"code": code, "message": MESSAGES[code], "value": round(float(value), 3), "limit": limit}
+
+
+def inspect_image(image):
+    """Inspect a downscaled copy of ``image``; return ``(problems, corners)``.
+
+    ``problems`` is empty when the photo is usable. ``corners`` is the card
+    outline in ``image`` coordinates for card_layout.rectify, None when no
+    outline was found, or card_layout.UNSEARCHED when the card check is off.
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, settings["max_side"] / max(height, width))
+    small = image
+    if scale < 1.0:
+        small = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    problems = []
+    corners = card_layout.UNSEARCHED
+    sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+    if sharpness < settings["min_sharpness"]:
+        problems.append(_problem("blurry", sharpness, settings["min_sharpness"]))
+
+    brightness = gray.mean()
+    if brightness < settings["min_brightness"]:
+        problems.append(_problem("too_dark", brightness, settings["min_brightness"]))
+    elif brightness > settings["max_brightness"]:
+        problems.append(_problem("too_bright", brightness, settings["max_brightness"]))
+
+    glare = (gray >= 250).mean()
+    if glare > settings["max_glare"]:
+        problems.append(_problem("glare", glare, settings["max_glare"]))
+
+    if settings["require_card"]:
+        # Either a card outline in the photo, or a photo cropped to the card
+        aspect = width / height
+        tight_crop = abs(aspect - card_layout.CARD_ASPECT) <= card_layout.ASPECT_TOLERANCE
+        if not tight_crop or card_layout.settings["enabled"]:
+            # Searched even for a tight crop when OCR will rectify the card anyway
+            corners = card_layout.locate_card(small)
+            if corners is not None:
+                corners = corners / scale
+        if not tight_crop and corners is None:
+            problems.append(_problem("no_card", aspect, round(card_layout.CARD_ASPECT, 3)))
+
+    return problems, corners
+
+
+def inspect_faces(image):
+    """Detect faces in ``image``; return ``(problems, faces)``."""
+    faces = detect_faces(image)
+    if settings["require_face"] and len(faces) != 1:
+        return [_problem("face_count", len(faces), 1)], faces
+    return [], faces
+
+
+def count_rejection(problems):
+    """Count a rejected upload, so /metrics shows how much OCR work was skipped."""
+    metrics.inc("quality_rejections_total", reason=problems[0]["code"])
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import deque
+
+
+class SlidingWindowLimiter:
+    """In-memory attempt limiter with a sliding time window per key.
+
+    Counts are per process, so with several gunicorn workers the effective
+    limit is up to ``limit * workers``; that still stops a burst cheaply
+    before any database or hashing work.
+    """
+
+    def __init__(self, limit=5, window=60):
+        self.limit = limit
+        self.window = window
+        self._attempts = {}  # key -> deque of attempt times, oldest first
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def hit(self, key, limit=None):
+        """Record an attempt for ``key``.
+
+        Returns 0 when it is allowed, otherwise the seconds until the oldest
+        attempt leaves the window. Rejected attempts are not recorded.
+        """
+        limit = limit or self.limit
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            attempts = self._attempts.get(key)
+            if attempts is None:
+                attempts = self._attempts[key] = deque()
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+            if len(attempts) >= limit:
+                return attempts[0] + self.window - now
+            attempts.append(now)
+            return 0
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def _sweep(self, now):
+        # Drop idle keys once per window so the table doesn't grow unbounded
+        if now - self._last_sweep < self.window:
+            return
+        self._last_sweep = now
+        cutoff = now - self.window
+        for key in [key for key, attempts in self._attempts.items() if not attempts or attempts[-1] <= cutoff]:
+            del self._attempts[key]
+
+
+class LoginLimiter:
+    """Login attempts limited per account (email) and per client IP."""
+
+    def __init__(self):
+        self.account_limit = 5
+        self.ip_limit = 20
+        self._window = SlidingWindowLimiter()
+
+    def init_app(self, app):
+        self.account_limit = app.config["LOGIN_ATTEMPTS_PER_ACCOUNT"]
+        self.ip_limit = app.config["LOGIN_ATTEMPTS_PER_IP"]
+        self._window = SlidingWindowLimiter(window=app.config["LOGIN_ATTEMPT_WINDOW"])
+
+    def hit(self, email, ip):
+        """Return ``(scope, retry_after)`` for a rejected attempt, or None."""
+        retry_after = self._window.hit(("ip", ip), self.ip_limit)
+        if retry_after:
+            return "ip", retry_after
+        retry_after = self._window.hit(("account", email), self.account_limit)
+        if retry_after:
+            return "account", retry_after
+        return None
+
+    def succeeded(self, email):
+        self._window.reset(("account", email))
+
+
+login_limiter = LoginLimiter()
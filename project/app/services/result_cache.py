@@ -0,0 +1,98 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class ResultCache:
+    """Two-tier cache of extraction results keyed by upload content hash.
+
+    An in-process LRU sits in front of a SQLite file shared by every
+    worker on the box. Both tiers evict by age (TTL) and size.
+    """
+
+    def __init__(self):
+        self.max_entries = 256
+        self.max_rows = 10000
+        self.ttl = 86400
+        self.path = None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_entries = app.config["RESULT_CACHE_SIZE"]
+        self.max_rows = app.config["RESULT_CACHE_MAX_ROWS"]
+        self.ttl = app.config["RESULT_CACHE_TTL"]
+        self.path = app.config["RESULT_CACHE_PATH"] or os.path.join(app.instance_path, "result_cache.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_result_cache_created_at ON result_cache (created_at)")
+
+    def get(self, key):
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    return value
+                del self._memory[key]
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM result_cache WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        return value
+
+    def set(self, key, value):
+        now = time.time()
+        self._remember(key, value, now)
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now),
+            )
+            # Drop expired rows, then the oldest ones beyond the size limit
+            conn.execute("DELETE FROM result_cache WHERE created_at <= ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM result_cache WHERE key IN ("
+                "SELECT key FROM result_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+
+    def _remember(self, key, value, created_at):
+        with self._lock:
+            self._memory[key] = (created_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+result_cache = ResultCache()
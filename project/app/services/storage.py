@@ -0,0 +1,146 @@
+"""Content-addressed media storage under ``UPLOAD_FOLDER``.
+
+Files are named by the SHA-256 of their content and sharded by its first
+two bytes, e.g. ``ktp/ab/cd/abcd....jpg``, so the same photo uploaded
+twice is stored once.
+"""
+import hashlib
+import os
+import re
+import uuid
+from collections import namedtuple
+from urllib.parse import unquote, urlsplit
+from flask import url_for
+
+CHUNK_SIZE = 64 * 1024
+EXTENSION_PATTERN = re.compile(r"^[a-z0-9]{1,5}$")
+# Partial uploads are written here before they are moved into place
+TEMP_DIR = "tmp"
+# Path of the upload.serve_media_file route, which every media URL goes through
+MEDIA_URL_PATH = "/upload/media/"
+
+# An upload streamed to a temporary file, not yet in its final place
+ReceivedFile = namedtuple("ReceivedFile", ["digest", "size", "temp_path"])
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload goes over MAX_UPLOAD_SIZE."""
+
+
+class MediaStorage:
+    def __init__(self):
+        self.root = None
+        self.max_size = 10 * 1024 * 1024
+
+    def init_app(self, app):
+        self.root = app.config["UPLOAD_FOLDER"]
+        self.max_size = app.config["MAX_UPLOAD_SIZE"]
+        os.makedirs(self._temp_dir(), exist_ok=True)
+
+    def _temp_dir(self):
+        return os.path.join(self.root, TEMP_DIR)
+
+    def relative_path(self, subdir, digest, extension):
+        return f"{subdir}/{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+    def path(self, relative_path):
+        return os.path.join(self.root, *relative_path.split("/"))
+
+    def url(self, relative_path):
+        return url_for("upload.serve_media_file", filename=relative_path, _external=True)
+
+    def relative_path_from_url(self, url):
+        """Inverse of ``url``: the stored file a media URL points to, or None for other URLs."""
+        path = urlsplit(url or "").path
+        start = path.find(MEDIA_URL_PATH)
+        if start < 0:
+            return None
+        relative_path = unquote(path[start + len(MEDIA_URL_PATH):])
+        parts = relative_path.split("/")
+        if not relative_path or any(part in ("", ".", "..") for part in parts):
+            return None
+        return relative_path
+
+    def exists(self, url):
+        """Whether the media file behind ``url`` is still stored."""
+        relative_path = self.relative_path_from_url(url)
+        return relative_path is not None and os.path.isfile(self.path(relative_path))
+
+    def receive(self, stream):
+        """Copy ``stream`` to a temporary file in chunks, hashing as it goes.
+
+        Raises UploadTooLargeError as soon as more than ``max_size`` bytes
+        arrive. Only one chunk is held in memory at a time; the content is
+        read back with ``read`` once it is known to be needed.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        temp_path = os.path.join(self._temp_dir(), uuid.uuid4().hex)
+        try:
+            with open(temp_path, "wb") as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise UploadTooLargeError(f"File is larger than the {self.max_size} byte limit")
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return ReceivedFile(digest.hexdigest(), size, temp_path)
+
+    def commit(self, received, subdir, extension):
+        """Move a received file into place and return its relative path.
+
+        If a file with the same content is already stored, the new copy is
+        dropped and the existing one is reused.
+        """
+        relative_path = self.relative_path(subdir, received.digest, extension)
+        path = self.path(relative_path)
+        if os.path.exists(path):
+            self.discard(received)
+            # Restart its retention grace period, it is in use again
+            os.utime(path)
+        else:
+            self._move_into_place(received.temp_path, path)
+        return relative_path
+
+    def read(self, relative_path):
+        with open(self.path(relative_path), "rb") as f:
+            return f.read()
+
+    def discard(self, received):
+        try:
+            os.remove(received.temp_path)
+        except FileNotFoundError:
+            pass
+
+    def write(self, path, data):
+        """Write ``data`` to the absolute ``path`` unless it already exists."""
+        if os.path.exists(path):
+            os.utime(path)
+            return
+        temp_path = os.path.join(self._temp_dir(), uuid.uuid4().hex)
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        self._move_into_place(temp_path, path)
+
+    def _move_into_place(self, temp_path, path):
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        try:
+            os.replace(temp_path, path)
+        except FileNotFoundError:
+            # The media collector removed the emptied shard folder in between
+            os.makedirs(folder, exist_ok=True)
+            os.replace(temp_path, path)
+
+
+def file_extension(filename, default="bin"):
+    """Lowercased extension of an uploaded filename, if it is a plain short one."""
+    _, dot, extension = (filename or "").rpartition(".")
+    extension = extension.lower()
+    return extension if dot and EXTENSION_PATTERN.match(extension) else default
+
+
+storage = MediaStorage()
@@ -0,0 +1,215 @@
+"""Nearest-match lookup of noisy OCR values against canonical vocabularies.
+
+Covers the enumerated KTP fields (religion, sex, marital status) and a
+gazetteer of Indonesian regions. Names are indexed by character trigrams;
+a lookup ranks entries by shared trigrams and confirms the best few with a
+bounded edit distance, so it touches a handful of strings instead of every
+entry.
+
+The gazetteer is read from a CSV in the Kemendagri region code format
+(``kode,nama``, e.g. ``32``, ``32.73``, ``32.73.01``, ``32.73.01.1001``),
+where the number of code parts gives the level, optionally gzipped. The
+bundled list has every province, regency, district and village (see
+``app/data/NOTICE``); GAZETTEER_PATH can point at a newer one.
+"""
+import csv
+import gzip
+import os
+import re
+import threading
+from collections import defaultdict
+
+from app.services.keyword_matcher import bounded_levenshtein
+
+BUNDLED_GAZETTEER = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "wilayah.csv.gz")
+
+LEVELS = ("province", "regency", "district", "village")
+
+# KTP values come without the regency type, which the keyword match strips
+REGENCY_PREFIX = re.compile(r"^(KABUPATEN|KAB|KOTA)( ADM)? ")
+
+settings = {
+    "gazetteer_path": BUNDLED_GAZETTEER,
+    # Region values further than this share of their length stay as read
+    "max_distance_ratio": 0.34,
+}
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def init_app(app):
+    settings["gazetteer_path"] = app.config["GAZETTEER_PATH"] or BUNDLED_GAZETTEER
+
+
+def normalize(text):
+    """Uppercase alphanumeric words, the same shape preprocess_text gives OCR values."""
+    return " ".join(re.sub(r"[^A-Za-z0-9]", " ", text).upper().split())
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Vocabulary:
+    """Canonical entries indexed by trigram for nearest-match lookups."""
+
+    def __init__(self, entries, max_candidates=16):
+        """``entries`` is an iterable of ``(name, value)``; names are matched, values returned."""
+        self.max_candidates = max_candidates
+        self._values = {}
+        self._postings = defaultdict(list)
+        for name, value in entries:
+            key = normalize(name)
+            if key in self._values:
+                continue
+            self._values[key] = value
+            for gram in _trigrams(key):
+                self._postings[gram].append(key)
+
+    @classmethod
+    def of(cls, names):
+        return cls((name, name) for name in names)
+
+    def __len__(self):
+        return len(self._values)
+
+    def lookup(self, text, max_distance_ratio=None):
+        """Return the value of the entry closest to ``text``.
+
+        With ``max_distance_ratio`` the match is rejected (None) when its
+        edit distance is above that share of the length of ``text``;
+        without it the nearest entry is always returned.
+        """
+        query = normalize(text)
+        if query in self._values:
+            return self._values[query]
+        if not query or not self._values:
+            return None
+
+        # Rank entries by the number of trigrams they share with the query
+        shared = defaultdict(int)
+        for gram in _trigrams(query):
+            for key in self._postings.get(gram, ()):
+                shared[key] += 1
+        candidates = sorted(shared, key=shared.get, reverse=True)[:self.max_candidates]
+        if not candidates and max_distance_ratio is None:
+            candidates = list(self._values)
+
+        if max_distance_ratio is None:
+            limit = max(len(query), max((len(key) for key in candidates), default=0))
+        else:
+            limit = int(len(query) * max_distance_ratio)
+
+        best = None
+        for key in candidates:
+            distance = bounded_levenshtein(query, key, limit)
+            if distance <= limit:
+                best, limit = key, distance - 1
+                if limit < 0:
+                    break
+        return self._values[best] if best is not None else None
+
+
+# Enumerated KTP values
+AGAMA = Vocabulary.of(["ISLAM", "KRISTEN", "KATOLIK", "HINDU", "BUDDHA", "KONGHUCU"])
+JENIS_KELAMIN = Vocabulary.of(["LAKI-LAKI", "PEREMPUAN"])
+STATUS_PERKAWINAN = Vocabulary.of(["KAWIN", "BELUM KAWIN", "CERAI HIDUP", "CERAI MATI"])
+
+
+class Gazetteer:
+    """Province, regency, district and village names with their codes.
+
+    Each level is searched within the entry matched one level up, so a
+    village is only compared with the villages of its district.
+    """
+
+    def __init__(self, rows):
+        self._names = {}
+        self._children = defaultdict(list)  # (level, parent code) -> [(name, code)]
+        self._namesakes = defaultdict(list)  # (parent code, name) -> [code]
+        for code, name in rows:
+            depth = code.count(".")
+            if depth >= len(LEVELS):
+                continue
+            level = LEVELS[depth]
+            name = normalize(name)
+            if level == "regency":
+                name = REGENCY_PREFIX.sub("", name)
+            self._names[code] = name
+            parent = code.rsplit(".", 1)[0] if depth else None
+            self._children[(level, parent)].append((name, code))
+            self._namesakes[(parent, name)].append(code)
+            if depth:
+                self._children[(level, None)].append((name, code))
+        # Levels with at least one entry; the others are passed through as read
+        self.levels = frozenset(level for level, parent in self._children if parent is None)
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", newline="", encoding="utf-8") as f:
+            return cls((row["kode"].strip(), row["nama"]) for row in csv.DictReader(f))
+
+    def _index(self, level, parent):
+        key = (level, parent)
+        index = self._indexes.get(key)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(key)
+                if index is None:
+                    if isinstance(parent, tuple):
+                        entries = [entry for code in parent for entry in self._children.get((level, code), ())]
+                    else:
+                        entries = self._children.get(key, ())
+                    index = self._indexes[key] = Vocabulary(entries)
+        return index
+
+    def match(self, level, text, parent=None):
+        """Return the code of the ``level`` entry nearest to ``text`` under ``parent``, or None.
+
+        ``parent`` is a code, or a tuple of codes whose entries are searched together.
+        """
+        index = self._index(level, parent)
+        if parent is not None and not len(index):
+            # Nothing listed under this parent, search the whole level
+            index = self._index(level, None)
+        return index.lookup(text, settings["max_distance_ratio"])
+
+    def resolve(self, values):
+        """Canonicalize region names, each level restricted by the one above.
+
+        ``values`` maps level names to OCR text; the result maps them to
+        the canonical name, or the text unchanged when nothing is close.
+        Levels missing from the gazetteer are left out of the result.
+        """
+        resolved = {}
+        parent = None
+        for level in LEVELS:
+            text = values.get(level)
+            if not text or level not in self.levels:
+                continue
+            code = self.match(level, text, parent)
+            if code is None:
+                resolved[level] = text
+                continue
+            name = self._names[code]
+            resolved[level] = name
+            # KTPs print "BANDUNG" for both KOTA and KABUPATEN BANDUNG, so the
+            # next level is searched under every namesake
+            namesakes = self._namesakes[(code.rsplit(".", 1)[0] if "." in code else None, name)]
+            parent = tuple(namesakes) if len(namesakes) > 1 else code
+        return resolved
+
+
+def get_gazetteer():
+    """Return the process-wide gazetteer, loading it on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer.load(settings["gazetteer_path"])
+    return _gazetteer
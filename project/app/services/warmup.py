@@ -0,0 +1,22 @@
+import time
+from app.services import ocr_service, vocabulary
+from app.services.photo_profile import get_face_cascade
+
+
+def warm_up():
+    """Prime the face detector, OCR model and gazetteer, returning seconds spent per step."""
+    timings = {}
+
+    start = time.perf_counter()
+    get_face_cascade()
+    timings["face_cascade"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ocr_service.warm_up()
+    timings["ocr"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vocabulary.get_gazetteer()
+    timings["gazetteer"] = time.perf_counter() - start
+
+    return timings
@@ -0,0 +1,176 @@
+"""Concurrency stress test for the database layer.
+
+Each worker process builds its own app (as a gunicorn worker would) and
+runs threads that register, log in, create a profile and read it back
+through the test client. Any failed request, and in particular any
+"database is locked" error, is counted and makes the run exit non-zero::
+
+    python -m benchmarks.db_concurrency
+    python -m benchmarks.db_concurrency --processes 4 --threads 16 --users 50
+    DATABASE_URI=postgresql://app@localhost/app python -m benchmarks.db_concurrency
+
+Without DATABASE_URI the run uses a fresh SQLite file in a temporary
+directory.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+STEPS = ["register", "login", "create_profile", "get_profile"]
+
+PROFILE = {
+    "nik": "3171234567890001",
+    "name": "BUDI SANTOSO",
+    "pob": "JAKARTA",
+    "dob": "17-08-1990",
+    "gender": "LAKI-LAKI",
+    "religion": "ISLAM",
+    "marital_status": "KAWIN",
+    "nationality": "WNI",
+    "occupation": "KARYAWAN SWASTA",
+    "province": "DKI JAKARTA",
+    "city": "JAKARTA SELATAN",
+    "subdistrict": "KEBAYORAN BARU",
+    "village": "SENAYAN",
+    "address": "JL MAWAR NO 12",
+    "rt": "001",
+    "rw": "002",
+}
+
+
+def run_user(client, prefix, timings, failures):
+    email = f"{prefix}-{uuid.uuid4().hex[:12]}@example.com"
+    # A distinct client address per user keeps the per-IP login limit out of the way
+    client.environ_base["REMOTE_ADDR"] = f"10.{random.randrange(256)}.{random.randrange(256)}.{random.randrange(256)}"
+
+    def step(name, expected, send):
+        start = time.perf_counter()
+        try:
+            response = send()
+        except Exception as e:
+            failures[f"{name}: {type(e).__name__}: {str(e).splitlines()[0]}"] += 1
+            return None
+        timings[name].append(time.perf_counter() - start)
+        if response.status_code != expected:
+            failures[f"{name}: HTTP {response.status_code} {response.get_data(as_text=True)[:120]}"] += 1
+            return None
+        return response
+
+    credentials = {"email": email, "password": "password123", "confirm_password": "password123", "phone": "0812"}
+    if not step("register", 201, lambda: client.post("/auth/register", json=credentials)):
+        return
+    response = step("login", 200, lambda: client.post("/auth/login", json=credentials))
+    if not response:
+        return
+
+    headers = {"Authorization": f"Bearer {response.json['token']}"}
+    user_id = response.json["data"]["id_account"]
+    if not step("create_profile", 201, lambda: client.post("/profile/", json=PROFILE, headers=headers)):
+        return
+    step("get_profile", 200, lambda: client.get(f"/profile/{user_id}", headers=headers))
+
+
+def run_worker(worker, threads, users, results):
+    # Imported here so every process builds its own app and engine
+    from app import create_app
+
+    app = create_app()
+    # Raise server errors in the client so "database is locked" shows up by name
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    timings = {name: [] for name in STEPS}
+    failures = Counter()
+    lock = threading.Lock()
+
+    def thread_main(index):
+        client = app.test_client()
+        local_timings = {name: [] for name in STEPS}
+        local_failures = Counter()
+        for _ in range(users):
+            run_user(client, f"w{worker}t{index}", local_timings, local_failures)
+        with lock:
+            for name in STEPS:
+                timings[name].extend(local_timings[name])
+            failures.update(local_failures)
+
+    pool = [threading.Thread(target=thread_main, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    results.put((timings, dict(failures)))
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer the auth and profile endpoints from many threads")
+    parser.add_argument("--processes", type=int, default=2, help="worker processes, each with its own engine")
+    parser.add_argument("--threads", type=int, default=8, help="threads per process")
+    parser.add_argument("--users", type=int, default=25, help="users registered per thread")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URI"):
+        directory = tempfile.mkdtemp(prefix="cakrawala-db-")
+        os.environ["DATABASE_URI"] = f"sqlite:///{directory}/stress.db"
+        os.environ.setdefault("RESULT_CACHE_PATH", os.path.join(directory, "result_cache.db"))
+    # Cheap hashes keep the load on the database rather than on password hashing
+    os.environ.setdefault("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+    print(f"database: {os.environ['DATABASE_URI']}")
+
+    # Create the tables once so workers don't race on DDL
+    from app import create_app
+    create_app()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    started = time.perf_counter()
+    workers = [
+        context.Process(target=run_worker, args=(i, args.threads, args.users, results))
+        for i in range(args.processes)
+    ]
+    for worker in workers:
+        worker.start()
+    collected = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    timings = {name: [] for name in STEPS}
+    failures = Counter()
+    for worker_timings, worker_failures in collected:
+        for name in STEPS:
+            timings[name].extend(worker_timings[name])
+        failures.update(worker_failures)
+
+    requests = sum(len(samples) for samples in timings.values())
+    print(f"{args.processes} processes x {args.threads} threads x {args.users} users: "
+          f"{requests} requests in {elapsed:.2f}s ({requests / elapsed:.0f} req/s)")
+    print()
+    print(f"{'step':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name in STEPS:
+        samples = sorted(timings[name])
+        if not samples:
+            continue
+        print(f"{name:<16}{len(samples):>8}{percentile(samples, 0.5) * 1000:>10.1f}"
+              f"{percentile(samples, 0.95) * 1000:>10.1f}{samples[-1] * 1000:>10.1f}")
+
+    locked = sum(count for message, count in failures.items() if "locked" in message)
+    print()
+    print(f"failures: {sum(failures.values())}, database is locked: {locked}")
+    for message, count in failures.most_common(10):
+        print(f"  {count:>5}  {message}")
+
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
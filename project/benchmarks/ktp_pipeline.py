@@ -0,0 +1,224 @@
+"""Latency and accuracy benchmark for the KTP extraction pipeline.
+
+Renders synthetic cards, runs them through each stage of the pipeline and
+reports per-stage timings and field-level accuracy against ground truth.
+The default stub OCR mode replays the text boxes from the renderer, so it
+runs offline without model weights::
+
+    python -m benchmarks.ktp_pipeline --cards 200
+    python -m benchmarks.ktp_pipeline --char-error-rate 0.03 --jitter 4
+    python -m benchmarks.ktp_pipeline --ocr local --cards 20
+    python -m benchmarks.ktp_pipeline --ocr local --backend onnx --cards 20
+    python -m benchmarks.ktp_pipeline --save-baseline baseline.json
+    python -m benchmarks.ktp_pipeline --compare baseline.json
+"""
+import argparse
+import io
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, redirect_stdout
+
+from PIL import Image
+
+from app.services import ocr_service
+from app.services.id_card_service import decode_image
+from app.services.ocr_service import (
+    OCRTextProcessor, TextEntityExtractor, post_processing, preprocess_text
+)
+from app.services.photo_profile import find_face
+from benchmarks.synthetic import make_cards
+from config import Config
+
+STAGES = ["decode", "face", "layout", "ocr", "line_grouping", "entity_extraction", "post_processing"]
+
+# Fields whose value is cleaned up by preprocess_text only
+TEXT_FIELDS = [
+    "provinsi", "nik", "nama", "alamat", "rt_rw", "kel_desa", "kecamatan",
+    "pekerjaan", "kewarganegaraan", "berlaku_hingga",
+]
+# Fields corrected to a canonical value by post_processing
+CANONICAL_FIELDS = ["jenis_kelamin", "agama", "status_perkawinan", "tempat_lahir", "tanggal_lahir"]
+
+
+class Timer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append((time.perf_counter() - start) * 1000)
+
+    def summary(self):
+        summary = {}
+        for name in STAGES:
+            samples = sorted(self.samples.get(name, []))
+            if not samples:
+                continue
+            summary[name] = {
+                "count": len(samples),
+                "mean_ms": sum(samples) / len(samples),
+                "p50_ms": samples[len(samples) // 2],
+                "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            }
+        return summary
+
+
+def expected_entities(fields):
+    """What a perfect run of the pipeline should return for ``fields``."""
+    expected = {field: preprocess_text(fields[field]) for field in TEXT_FIELDS}
+    # The regency line starts with its KOTA/KABUPATEN keyword
+    expected["kabupaten"] = preprocess_text(fields["kabupaten"].split(" ", 1)[1])
+    for field in CANONICAL_FIELDS:
+        expected[field] = fields[field]
+    return expected
+
+
+def run_card(timer, image_bytes, ocr_output, ocr_mode):
+    image = None
+    face_box = None
+    if image_bytes is not None:
+        with timer.stage("decode"):
+            image = decode_image(image_bytes)
+        # find_face prints when it finds no face
+        with timer.stage("face"), redirect_stdout(io.StringIO()):
+            face_box = find_face(image)
+
+    # The stub replays boxes in the original card's coordinates, so the
+    # layout step only runs with real OCR
+    if ocr_mode != "stub":
+        with timer.stage("layout"):
+            image, image_bytes = ocr_service.prepare_card(image, image_bytes, face_box)
+        with timer.stage("ocr"):
+            ocr_output = ocr_service.readtext(image, image_bytes)
+
+    with timer.stage("line_grouping"):
+        lines = OCRTextProcessor().process_ocr_result(ocr_output)
+
+    with timer.stage("entity_extraction"):
+        processed = [preprocess_text(line) for line in lines if line]
+        entities = TextEntityExtractor().extract_entities(processed)
+
+    with timer.stage("post_processing"):
+        entities = post_processing(entities)
+
+    return entities, face_box is not None
+
+
+def load_recorded(path):
+    """Read recorded cases, one JSON object per line with ``fields`` and ``ocr``.
+
+    An optional ``image`` path adds the decode and face stages.
+    """
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            case = json.loads(line)
+            image_bytes = None
+            if case.get("image"):
+                with open(case["image"], "rb") as image_file:
+                    image_bytes = image_file.read()
+            yield case["fields"], image_bytes, case["ocr"]
+
+
+def run(args):
+    if args.ocr == "sidecar":
+        ocr_service.settings.update(mode="sidecar", socket_path=args.socket)
+    elif args.ocr == "local":
+        ocr_service.settings.update(backend=args.backend, backend_options=Config.OCR_BACKEND_OPTIONS[args.backend])
+
+    if args.recorded:
+        cases = load_recorded(args.recorded)
+    else:
+        face = Image.open(args.face_image).convert("RGB") if args.face_image else None
+        cases = make_cards(args.cards, args.seed, face, args.char_error_rate, args.jitter)
+
+    timer = Timer()
+    correct = defaultdict(int)
+    total = 0
+    faces_found = 0
+    for fields, image_bytes, ocr_output in cases:
+        entities, face_found = run_card(timer, image_bytes, ocr_output, args.ocr)
+        faces_found += face_found
+        total += 1
+        for field, value in expected_entities(fields).items():
+            correct[field] += entities.get(field) == value
+
+    fields = TEXT_FIELDS + ["kabupaten"] + CANONICAL_FIELDS
+    accuracy = {field: correct[field] / total for field in fields} if total else {}
+    return {
+        "cards": total,
+        "faces_found": faces_found,
+        "stages": timer.summary(),
+        "accuracy": accuracy,
+        "overall_accuracy": sum(accuracy.values()) / len(accuracy) if accuracy else 0.0,
+    }
+
+
+def report(result, baseline=None):
+    def delta(current, previous, unit=""):
+        if previous is None:
+            return ""
+        return f"  ({current - previous:+.2f}{unit})"
+
+    base_stages = baseline["stages"] if baseline else {}
+    base_accuracy = baseline["accuracy"] if baseline else {}
+
+    print(f"cards: {result['cards']}, faces found: {result['faces_found']}")
+    print()
+    print(f"{'stage':<20}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, stats in result["stages"].items():
+        previous = base_stages.get(name, {}).get("mean_ms")
+        print(
+            f"{name:<20}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+            f"{delta(stats['mean_ms'], previous, ' ms')}"
+        )
+    print()
+    print(f"{'field':<20}{'accuracy':>10}")
+    for field, value in result["accuracy"].items():
+        print(f"{field:<20}{value:>10.1%}{delta(value * 100, _scaled(base_accuracy.get(field)), ' pt')}")
+    previous = _scaled(baseline["overall_accuracy"]) if baseline else None
+    print(f"{'overall':<20}{result['overall_accuracy']:>10.1%}{delta(result['overall_accuracy'] * 100, previous, ' pt')}")
+
+
+def _scaled(value):
+    return value * 100 if value is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the KTP extraction pipeline")
+    parser.add_argument("--cards", type=int, default=100, help="number of synthetic cards")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ocr", choices=["stub", "local", "sidecar"], default="stub",
+                        help="stub replays the rendered text boxes instead of running OCR")
+    parser.add_argument("--backend", choices=sorted(Config.OCR_BACKEND_OPTIONS), default=Config.OCR_BACKEND,
+                        help="OCR backend for --ocr local")
+    parser.add_argument("--socket", default="/tmp/cakrawala-ocr.sock", help="OCR server socket for --ocr sidecar")
+    parser.add_argument("--char-error-rate", type=float, default=0.0, help="stub OCR character error rate")
+    parser.add_argument("--jitter", type=float, default=0.0, help="stub OCR vertical box jitter in pixels")
+    parser.add_argument("--face-image", help="portrait photo to paste into the card's photo area")
+    parser.add_argument("--recorded", help="JSONL file of recorded readtext outputs with ground truth")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="show differences against a saved baseline")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Scaling benchmark for OCRTextProcessor line grouping.
+
+Lays out pages of word boxes in known lines, rotates them by a skew angle,
+adds vertical jitter and shuffles their order, then reports grouping time
+and the share of lines recovered exactly at each page size::
+
+    python -m benchmarks.line_grouping
+    python -m benchmarks.line_grouping --skew 4 --jitter 3
+    python -m benchmarks.line_grouping --sizes 100 400 1600 --words-per-line 10
+"""
+import argparse
+import math
+import random
+import time
+
+from app.services.ocr_service import OCRTextProcessor
+
+WORD_HEIGHT = 20
+LINE_PITCH = 32
+
+
+def make_page(rng, boxes, words_per_line, skew, jitter):
+    """Return ``(readtext_output, lines)`` for a page of about ``boxes`` words."""
+    angle = math.radians(skew)
+    cos, sin = math.cos(angle), math.sin(angle)
+    words = []
+    lines = []
+    for row in range(math.ceil(boxes / words_per_line)):
+        x = 30.0
+        y = 40.0 + row * LINE_PITCH
+        line = []
+        for column in range(min(words_per_line, boxes - len(words))):
+            width = rng.uniform(30, 140)
+            dy = rng.uniform(-jitter, jitter)
+            corners = [(x, y), (x + width, y), (x + width, y + WORD_HEIGHT), (x, y + WORD_HEIGHT)]
+            box = [[cx * cos - (cy + dy) * sin, cx * sin + (cy + dy) * cos] for cx, cy in corners]
+            text = f"w{row}_{column}"
+            words.append((box, text, rng.uniform(0.5, 1.0)))
+            line.append(text)
+            x += width + rng.uniform(8, 20)
+        lines.append(" ".join(line))
+    rng.shuffle(words)
+    return words, lines
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    processor = OCRTextProcessor()
+    results = []
+    for size in args.sizes:
+        pages = [make_page(rng, size, args.words_per_line, args.skew, args.jitter) for _ in range(args.pages)]
+        processor.process_ocr_result(pages[0][0])
+
+        correct = total = 0
+        start = time.perf_counter()
+        for words, _ in pages:
+            processor.process_ocr_result(words)
+        elapsed = (time.perf_counter() - start) * 1000 / len(pages)
+
+        for words, lines in pages:
+            found = set(processor.process_ocr_result(words))
+            correct += sum(line in found for line in lines)
+            total += len(lines)
+        results.append((size, elapsed, correct / total))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR line grouping against page size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 50, 100, 200, 400, 800],
+                        help="word boxes per page")
+    parser.add_argument("--pages", type=int, default=50, help="pages per size")
+    parser.add_argument("--words-per-line", type=int, default=6)
+    parser.add_argument("--skew", type=float, default=2.0, help="page rotation in degrees")
+    parser.add_argument("--jitter", type=float, default=2.0, help="vertical box jitter in pixels")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'boxes':>8}{'mean ms':>10}{'us/box':>10}{'lines ok':>10}")
+    for size, elapsed, accuracy in run(args):
+        print(f"{size:>8}{elapsed:>10.2f}{elapsed * 1000 / size:>10.1f}{accuracy:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Synthetic KTP cards with ground truth and matching ``readtext`` output."""
+import io
+import random
+
+from PIL import Image, ImageDraw, ImageFont
+
+CARD_SIZE = (1000, 630)
+BACKGROUND = (176, 214, 236)
+
+NAMES = ["BUDI SANTOSO", "SITI AMINAH", "AGUS SETIAWAN", "DEWI LESTARI", "RINA WULANDARI", "HENDRA GUNAWAN"]
+PLACES = ["JAKARTA", "BANDUNG", "SURABAYA", "SEMARANG", "YOGYAKARTA", "MEDAN"]
+REGIONS = [
+    ("DKI JAKARTA", "KOTA JAKARTA SELATAN", "KEBAYORAN BARU", "SENAYAN"),
+    ("JAWA BARAT", "KOTA BANDUNG", "COBLONG", "DAGO"),
+    ("JAWA TIMUR", "KOTA SURABAYA", "GUBENG", "AIRLANGGA"),
+    ("JAWA TENGAH", "KABUPATEN SEMARANG", "UNGARAN BARAT", "BANDARJO"),
+]
+STREETS = ["JL MAWAR NO 12", "JL MELATI BLOK C", "JL KENANGA RAYA", "JL SUDIRMAN NO 45"]
+RELIGIONS = ["ISLAM", "KRISTEN", "KATOLIK", "HINDU", "BUDDHA", "KONGHUCU"]
+GENDERS = ["LAKI-LAKI", "PEREMPUAN"]
+MARITAL = ["KAWIN", "BELUM KAWIN", "CERAI HIDUP", "CERAI MATI"]
+JOBS = ["KARYAWAN SWASTA", "WIRASWASTA", "PELAJAR MAHASISWA", "PEGAWAI NEGERI SIPIL"]
+
+# Label and value rows in the order they appear on the card
+ROWS = [
+    ("NIK", "nik"),
+    ("Nama", "nama"),
+    ("Tempat/Tgl Lahir", "tempat_tgl_lahir"),
+    ("Jenis Kelamin", "jenis_kelamin"),
+    ("Alamat", "alamat"),
+    ("RT/RW", "rt_rw"),
+    ("Kel/Desa", "kel_desa"),
+    ("Kecamatan", "kecamatan"),
+    ("Agama", "agama"),
+    ("Status Perkawinan", "status_perkawinan"),
+    ("Pekerjaan", "pekerjaan"),
+    ("Kewarganegaraan", "kewarganegaraan"),
+    ("Berlaku Hingga", "berlaku_hingga"),
+]
+
+
+def random_fields(rng):
+    province, regency, district, village = rng.choice(REGIONS)
+    return {
+        "provinsi": province,
+        "kabupaten": regency,
+        "nik": "".join(rng.choice("0123456789") for _ in range(16)),
+        "nama": rng.choice(NAMES),
+        "tempat_lahir": rng.choice(PLACES),
+        "tanggal_lahir": f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(1960, 2005)}",
+        "jenis_kelamin": rng.choice(GENDERS),
+        "alamat": rng.choice(STREETS),
+        "rt_rw": f"{rng.randint(1, 20):03d}/{rng.randint(1, 20):03d}",
+        "kel_desa": village,
+        "kecamatan": district,
+        "agama": rng.choice(RELIGIONS),
+        "status_perkawinan": rng.choice(MARITAL),
+        "pekerjaan": rng.choice(JOBS),
+        "kewarganegaraan": "WNI",
+        "berlaku_hingga": "SEUMUR HIDUP",
+    }
+
+
+def _value_text(fields, key):
+    if key == "tempat_tgl_lahir":
+        return f"{fields['tempat_lahir']}, {fields['tanggal_lahir']}"
+    return fields[key]
+
+
+def _box(bbox):
+    x1, y1, x2, y2 = bbox
+    return [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+
+
+def render_card(fields, face=None):
+    """Draw a KTP-like card and return ``(image, words)``.
+
+    ``words`` is the ``readtext`` output a perfect OCR engine would give:
+    one ``(box, text, confidence)`` per label and per value.
+    """
+    image = Image.new("RGB", CARD_SIZE, BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    header_font = ImageFont.load_default(size=34)
+    font = ImageFont.load_default(size=24)
+    words = []
+
+    def text(position, value, text_font):
+        draw.text(position, value, fill=(20, 20, 20), font=text_font)
+        words.append((_box(draw.textbbox(position, value, font=text_font)), value, 1.0))
+
+    width = CARD_SIZE[0]
+    for y, value in ((18, f"PROVINSI {fields['provinsi']}"), (62, fields["kabupaten"])):
+        left = (width - draw.textlength(value, font=header_font)) // 2
+        text((left, y), value, header_font)
+
+    y = 120
+    for label, key in ROWS:
+        text((30, y), label, font)
+        text((260, y), f": {_value_text(fields, key)}", font)
+        y += 38
+
+    # Photo area on the right, as on a real card
+    photo_box = (770, 150, 960, 400)
+    if face is not None:
+        image.paste(face.resize((photo_box[2] - photo_box[0], photo_box[3] - photo_box[1])), photo_box[:2])
+    else:
+        draw.rectangle(photo_box, fill=(150, 150, 150))
+
+    return image, words
+
+
+def corrupt(words, rng, char_error_rate=0.0, jitter=0.0):
+    """Simulate OCR noise: character substitutions and box jitter."""
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    noisy = []
+    for box, text, confidence in words:
+        chars = [
+            rng.choice(alphabet) if c.isalnum() and rng.random() < char_error_rate else c
+            for c in text
+        ]
+        dy = rng.uniform(-jitter, jitter)
+        noisy_box = [[x, y + dy] for x, y in box]
+        noisy.append((noisy_box, "".join(chars), confidence * (1 - char_error_rate)))
+    return noisy
+
+
+def encode(image, quality=90):
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def make_cards(count, seed=0, face=None, char_error_rate=0.0, jitter=0.0):
+    """Yield ``(fields, jpeg_bytes, readtext_output)`` for ``count`` cards."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        fields = random_fields(rng)
+        image, words = render_card(fields, face)
+        yield fields, encode(image), corrupt(words, rng, char_error_rate, jitter)
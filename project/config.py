@@ -7,3 +7,163 @@ class Config:
     UPLOAD_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), "media"))
     JSON_SORT_KEYS = True
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your_jwt_secret_key")
+
+    # Password hashing: werkzeug method string with its work factor,
+    # e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    # Concurrent hashes per worker process; a limit, not a background pool
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+
+    # Proxies in front of the app (e.g. 1 behind Nginx) whose X-Forwarded-For,
+    # -Proto and -Host headers are trusted; 0 ignores the headers, which is
+    # right when clients connect to the app directly
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", 0))
+    PROXY_FIX_X_PROTO = int(os.getenv("PROXY_FIX_X_PROTO", 0))
+    PROXY_FIX_X_HOST = int(os.getenv("PROXY_FIX_X_HOST", 0))
+
+    # Login attempts allowed per sliding window (seconds)
+    LOGIN_ATTEMPTS_PER_ACCOUNT = int(os.getenv("LOGIN_ATTEMPTS_PER_ACCOUNT", 5))
+    LOGIN_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_ATTEMPTS_PER_IP", 20))
+    LOGIN_ATTEMPT_WINDOW = int(os.getenv("LOGIN_ATTEMPT_WINDOW", 60))
+
+    # Connection pool, per worker process (ignored for in-memory SQLite)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+    # SQLite connection pragmas: WAL lets readers run alongside one writer,
+    # NORMAL sync is durable in WAL mode except on power loss
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 15000))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+
+    # Largest single uploaded file, and largest request body (batch uploads)
+    MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 10 * 1024 * 1024))
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 64 * 1024 * 1024))
+
+    # Resized copies of uploaded media served with ?variant=<name>,
+    # as longest side in pixels
+    MEDIA_VARIANTS = {
+        "thumb": int(os.getenv("MEDIA_THUMB_SIZE", 256)),
+        "medium": int(os.getenv("MEDIA_MEDIUM_SIZE", 1024)),
+    }
+    MEDIA_VARIANT_FORMAT = os.getenv("MEDIA_VARIANT_FORMAT", "webp")
+    MEDIA_VARIANT_QUALITY = int(os.getenv("MEDIA_VARIANT_QUALITY", 80))
+    MEDIA_VARIANTS_ON_UPLOAD = os.getenv("MEDIA_VARIANTS_ON_UPLOAD", "true").lower() in ("1", "true", "yes")
+    # Cache-Control max-age for /upload/media responses
+    MEDIA_MAX_AGE = int(os.getenv("MEDIA_MAX_AGE", 365 * 24 * 3600))
+    # ID card scans and face crops are personal data: only the client may
+    # cache them, never shared proxies or CDNs, unless this is turned off
+    MEDIA_CACHE_PRIVATE = os.getenv("MEDIA_CACHE_PRIVATE", "true").lower() in ("1", "true", "yes")
+
+    # flask gc-media: unreferenced media older than the grace period (seconds)
+    # is deleted, or moved to MEDIA_GC_ARCHIVE_FOLDER, in batches with a pause.
+    # Keep the grace period longer than RESULT_CACHE_TTL, since cache hits
+    # don't refresh the files they point to; gc-media refuses to run otherwise
+    MEDIA_GC_GRACE_PERIOD = int(os.getenv("MEDIA_GC_GRACE_PERIOD", 7 * 24 * 3600))
+    MEDIA_GC_BATCH_SIZE = int(os.getenv("MEDIA_GC_BATCH_SIZE", 200))
+    MEDIA_GC_BATCH_PAUSE = float(os.getenv("MEDIA_GC_BATCH_PAUSE", 0.2))
+    MEDIA_GC_ARCHIVE_FOLDER = os.getenv("MEDIA_GC_ARCHIVE_FOLDER")
+
+    # ID card extraction worker pool
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", 2))
+    OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", 8))
+    JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", 3600))
+    # Jobs still pending after this many seconds were lost (e.g. the worker
+    # restarted) and are marked failed
+    JOB_PENDING_TIMEOUT = int(os.getenv("JOB_PENDING_TIMEOUT", 900))
+
+    # Batch ID card extraction
+    BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", 32))
+    FACE_WORKERS = int(os.getenv("FACE_WORKERS", 4))
+
+    # OCR inference: "local" loads the model in-process (development),
+    # "sidecar" sends images to the shared server in app/services/ocr_server.py
+    OCR_MODE = os.getenv("OCR_MODE", "local")
+    OCR_SOCKET_PATH = os.getenv("OCR_SOCKET_PATH", "/tmp/cakrawala-ocr.sock")
+    OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", 60))
+    OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", 8))
+    OCR_BATCH_WINDOW_MS = float(os.getenv("OCR_BATCH_WINDOW_MS", 20))
+
+    # OCR engine, in-process or in the OCR server: "easyocr" (PyTorch),
+    # "onnx" (ONNX Runtime with exported, optionally 8-bit, detector and
+    # recognizer models) or "stub" (fixed readings for tests)
+    OCR_BACKEND = os.getenv("OCR_BACKEND", "easyocr")
+    OCR_MODEL_FOLDER = os.getenv("OCR_MODEL_FOLDER", os.path.abspath(os.path.join(os.path.dirname(__file__), "models")))
+    OCR_BACKEND_OPTIONS = {
+        "easyocr": {"languages": os.getenv("OCR_LANGUAGES", "id").split(",")},
+        "onnx": {
+            "detector_path": os.getenv("OCR_ONNX_DETECTOR", os.path.join(OCR_MODEL_FOLDER, "detector.onnx")),
+            "recognizer_path": os.getenv("OCR_ONNX_RECOGNIZER", os.path.join(OCR_MODEL_FOLDER, "recognizer.onnx")),
+            "charset_path": os.getenv("OCR_ONNX_CHARSET", os.path.join(OCR_MODEL_FOLDER, "charset.txt")),
+            # ONNX Runtime intra-op threads per worker process
+            "threads": int(os.getenv("OCR_ONNX_THREADS", 1)),
+        },
+        "stub": {"path": os.getenv("OCR_STUB_PATH")},
+    }
+
+    # Tiered OCR: read a copy downscaled to OCR_FAST_MAX_SIDE first and rerun
+    # at full resolution only if nik, nama or tempat_tgl_lahir is missing or
+    # below OCR_MIN_CONFIDENCE
+    OCR_TIERED = os.getenv("OCR_TIERED", "true").lower() in ("1", "true", "yes")
+    OCR_FAST_MAX_SIDE = int(os.getenv("OCR_FAST_MAX_SIDE", 640))
+    OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", 0.5))
+
+    # Face detection profile for the ID card photo crop
+    FACE_DETECTION = {
+        "scale_factor": float(os.getenv("FACE_SCALE_FACTOR", 1.1)),
+        "min_neighbors": int(os.getenv("FACE_MIN_NEIGHBORS", 2)),
+        "min_size": (40, 60),
+        "max_side": int(os.getenv("FACE_MAX_SIDE", 800)),
+    }
+
+    # Card localization before OCR: the card is warped to width x height and
+    # its photo column (from photo_column of the width, below header_height)
+    # is blanked out
+    CARD_LAYOUT = {
+        "enabled": os.getenv("CARD_LAYOUT_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "width": int(os.getenv("CARD_WIDTH", 1000)),
+        "height": int(os.getenv("CARD_HEIGHT", 630)),
+        "min_area": 0.2,
+        "max_side": 640,
+        "photo_column": 0.72,
+        "header_height": 0.2,
+    }
+
+    # Photo quality gate run before face detection and OCR
+    QUALITY_GATE = {
+        "enabled": os.getenv("QUALITY_GATE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "max_side": 480,
+        "min_sharpness": float(os.getenv("QUALITY_MIN_SHARPNESS", 60)),
+        "min_brightness": float(os.getenv("QUALITY_MIN_BRIGHTNESS", 40)),
+        "max_brightness": float(os.getenv("QUALITY_MAX_BRIGHTNESS", 225)),
+        "max_glare": float(os.getenv("QUALITY_MAX_GLARE", 0.08)),
+        "require_card": True,
+        "require_face": True,
+    }
+
+    # Region code list (kode,nama CSV, optionally .gz) used to correct
+    # provinsi, kabupaten, kecamatan and kel_desa; unset uses the bundled list
+    GAZETTEER_PATH = os.getenv("GAZETTEER_PATH")
+
+    # Extraction result cache keyed by upload content hash
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 256))
+    RESULT_CACHE_MAX_ROWS = int(os.getenv("RESULT_CACHE_MAX_ROWS", 10000))
+    # Must stay below MEDIA_GC_GRACE_PERIOD
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", 86400))
+    RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH")
+
+    # Prometheus /metrics endpoint and Server-Timing headers
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    # Serialized GET /profile/<user_id> responses
+    PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", 10))
+    PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", 1024))
+
+    # Rows fetched per keyset page by the admin export
+    EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", 1000))
+
+    # Rows inserted per transaction by the bulk profile import
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
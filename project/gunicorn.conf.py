@@ -0,0 +1,15 @@
+# Gunicorn settings, used with: gunicorn -c gunicorn.conf.py main:app
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+
+
+def post_worker_init(worker):
+    """Prime OCR and OpenCV resources before the worker accepts requests."""
+    from app.services.warmup import warm_up
+
+    with worker.wsgi.app_context():
+        timings = warm_up()
+    report = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in timings.items())
+    worker.log.info(f"Worker {worker.pid} warmed up: {report}")